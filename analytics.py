@@ -0,0 +1,141 @@
+from __future__ import annotations
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM
+
+# Quality-control statistics for a whole grid.
+#
+# The per-cell work is done on the cell bytes at once: translate() maps each
+# cell to "passage to the right / below is open", and adding those strings as
+# big integers, shifted by one cell for the left neighbour and by one row for
+# the one above, gives every cell's degree (open passages, 0-4) as one byte
+# string. Dead ends, corridor cells and junctions are then byte counts.
+#
+# Connectivity, loops, corridor lengths and the solution need one traversal.
+# It walks a per-cell bit mask of open directions (built the same way), so
+# the Python loop does no wall tests of its own. Loops are counted exactly as
+# passages - cells + components (0 for a perfect maze).
+#
+# analyze(grid) returns a plain dict:
+#   cells, passages, components, loops, perfect
+#   dead_ends, corridors, junctions   cells with 1, 2, 3+ open passages
+#   corridor_lengths   {moves: count} over the stretches between cells that
+#                      are not corridor cells (dead ends, junctions), taken
+#                      along a spanning tree when the maze has loops
+#   solution_length    moves from the entrance (0, 0) to the exit (the last
+#                      cell), None if they are not connected
+#   river              off-solution cells per dead end: high for a few long,
+#                      winding side branches, low for many short stubs;
+#                      None without a solution
+
+# translate() tables: passage to the right / below open, and degree 2
+_OPEN_RIGHT = bytes(0 if b & WALL_RIGHT else 1 for b in range(256))
+_OPEN_DOWN = bytes(0 if b & WALL_BOTTOM else 1 for b in range(256))
+_IS_CORRIDOR = bytes(1 if b == 2 else 0 for b in range(256))
+
+
+def _open_sides(grid: Grid):
+    # (right, down) as big integers holding one 0/1 byte per cell, big-endian
+    # so cell 0 is the most significant byte; the last column has no right
+    # passage and the last row no downward one
+    cols = grid.num_cols
+    n = len(grid)
+    walls = grid.wall_bytes()
+    inner = (b"\x01" * (cols - 1) + b"\x00") * grid.num_rows
+    right = int.from_bytes(walls.translate(_OPEN_RIGHT), "big") & int.from_bytes(inner, "big")
+    down = int.from_bytes(walls.translate(_OPEN_DOWN), "big") >> (8 * cols) << (8 * cols)
+    return right, down, n
+
+
+def degrees(grid: Grid):
+    # open passages per cell as a bytes object, row-major
+    right, down, n = _open_sides(grid)
+    cols = grid.num_cols
+    # the left neighbour's right passage is this cell's left one, and so on
+    return (right + (right >> 8) + down + (down >> (8 * cols))).to_bytes(n, "big")
+
+
+def _directions(grid: Grid):
+    # per cell, the open directions as bits 1 << events direction: 1 right,
+    # 2 down, 4 left, 8 up
+    right, down, n = _open_sides(grid)
+    cols = grid.num_cols
+    return (right | (down << 1) | ((right >> 8) << 2) | ((down >> (8 * cols)) << 3)).to_bytes(n, "big")
+
+
+def analyze(grid: Grid):
+    cols = grid.num_cols
+    n = len(grid)
+    exit_ = n - 1
+    degree = degrees(grid)
+    dead_ends = degree.count(1)
+    corridors = degree.count(2)
+    junctions = n - dead_ends - corridors - degree.count(0)
+    passages = (dead_ends + 2 * corridors + 3 * degree.count(3) + 4 * degree.count(4)) // 2
+
+    # moves to each open direction mask
+    steps = [
+        tuple(move for bit, move in zip((1, 2, 4, 8), (1, cols, -1, -cols)) if mask & bit)
+        for mask in range(16)
+    ]
+    directions = _directions(grid)
+    # Breadth-first from the entrance, then from the first unreached cell of
+    # each further component. Every frontier cell carries the depth of the
+    # last non-corridor cell on its way from the root (its anchor); popping a
+    # non-corridor cell ends a stretch of depth - anchor moves. A root in the
+    # middle of a corridor is no stretch end: cells below it carry anchor -1,
+    # and the two halves of its stretch are joined once both are found.
+    is_corridor = degree.translate(_IS_CORRIDOR)
+    lengths = [0] * n
+    components = 0
+    solution_length = 0 if exit_ == 0 else None
+    seen = bytearray(n)
+    root = 0
+    while root >= 0:
+        components += 1
+        seen[root] = 1
+        frontier = [root]
+        anchors = [-1 if is_corridor[root] else 0]
+        halves = []
+        d = 0
+        while frontier:
+            d += 1
+            next_frontier = []
+            next_anchors = []
+            append = next_frontier.append
+            append_anchor = next_anchors.append
+            for i, a in zip(frontier, anchors):
+                if not is_corridor[i]:
+                    if a < 0:
+                        halves.append(d - 1)
+                    else:
+                        lengths[d - 1 - a] += 1
+                    a = d - 1
+                for move in steps[directions[i]]:
+                    j = i + move
+                    if not seen[j]:
+                        seen[j] = 1
+                        append(j)
+                        append_anchor(a)
+            frontier = next_frontier
+            anchors = next_anchors
+            if solution_length is None and components == 1 and seen[exit_]:
+                solution_length = d
+        # one half is all there is when the other closed a loop first
+        if halves:
+            lengths[sum(halves)] += 1
+        root = seen.find(0, root)
+
+    loops = passages - n + components
+    return {
+        "cells": n,
+        "passages": passages,
+        "components": components,
+        "loops": loops,
+        "perfect": components == 1 and loops == 0,
+        "dead_ends": dead_ends,
+        "corridors": corridors,
+        "junctions": junctions,
+        # lengths[0] only counts the roots
+        "corridor_lengths": {moves: count for moves, count in enumerate(lengths) if count and moves},
+        "solution_length": solution_length,
+        "river": None if solution_length is None else (n - solution_length - 1) / max(dead_ends, 1),
+    }
@@ -0,0 +1,315 @@
+from __future__ import annotations
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from grid import Grid
+from maze import Maze
+from solvers import SOLVERS
+from generators import GENERATORS, eller_rows, write_rows
+from window import Renderer
+import export
+
+# Square grid sizes used when no sizes are given on the command line
+DEFAULT_SIZES = (10, 50, 100, 200, 500, 1000)
+# Sizes for the regression suite (--suite) and the baseline it is compared to
+SUITE_SIZES = (10, 100, 500, 1000, 2000)
+# _measure keeps repeating a case until it has been timed for MIN_TIMED
+# seconds, or MAX_REPEAT times
+MIN_TIMED = 1.0
+MAX_REPEAT = 25
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+SEED = 1
+
+
+def bench_generate(size, seed=0, algorithm="dfs"):
+    # headless construction: no window, so nothing is drawn or slept
+    start = time.perf_counter()
+    maze = Maze(0, 0, size, size, 10, 10, seed=seed, algorithm=algorithm)
+    elapsed = time.perf_counter() - start
+    return maze, elapsed
+
+
+def bench_solve(maze, algorithm="dfs"):
+    start = time.perf_counter()
+    result = maze.solve(algorithm=algorithm)
+    return time.perf_counter() - start, result.expanded
+
+
+class _ObjectCell:
+    # the old per-cell layout: four wall booleans, a visited flag, four
+    # coordinates and a window reference in an instance dict
+    def __init__(self, win=None):
+        self.has_left_wall = True
+        self.has_right_wall = True
+        self.has_top_wall = True
+        self.has_bottom_wall = True
+        self.visited = False
+        self.x1 = -1
+        self.x2 = -1
+        self.y1 = -1
+        self.y2 = -1
+        self.win = win
+
+
+def _traced_peak(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def bench_memory(size):
+    # peak bytes to hold a size x size grid in each layout
+    objects = _traced_peak(lambda: [[_ObjectCell() for _ in range(size)] for _ in range(size)])
+    packed = _traced_peak(lambda: Grid(size, size))
+    return objects, packed
+
+
+def bench_eller(width, height, seed=0):
+    # stream rows straight to /dev/null; returns rows/s and the peak traced
+    # bytes of a second, traced run (tracemalloc slows the timing run down)
+    def run():
+        with open(os.devnull, "wb") as sink:
+            write_rows(eller_rows(width, height, random.Random(seed)), sink)
+
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    return height / elapsed, _traced_peak(run)
+
+
+class _NullWindow:
+    # accepts drawing calls and drops them, so the "draw" case measures
+    # Maze/Cell drawing code rather than tkinter
+    bg = "white"
+
+    def draw_line(self, line, fill_color):
+        pass
+
+    def redraw(self):
+        pass
+
+    def resize(self, width, height):
+        pass
+
+
+def _suite_cases(size):
+    # (name, setup, run): setup() builds the input outside the measurement,
+    # run(input) is the measured work. Every case uses the fixed SEED.
+    mazes = {}
+
+    def built(algorithm="dfs"):
+        # shared by the read-only cases of one size, built on first use
+        def setup():
+            if algorithm not in mazes:
+                mazes[algorithm] = Maze(0, 0, size, size, 10, 10, seed=SEED, algorithm=algorithm)
+            return mazes[algorithm]
+        return setup
+
+    def nothing():
+        return None
+
+    cases = [("construct", nothing, lambda _: Maze(0, 0, size, size, 10, 10, seed=SEED, carve=False))]
+    for algorithm in GENERATORS:
+        cases.append((f"generate/{algorithm}", nothing,
+                      lambda _, a=algorithm: Maze(0, 0, size, size, 10, 10, seed=SEED, algorithm=a)))
+    for algorithm in SOLVERS:
+        cases.append((f"solve/{algorithm}", built(), lambda maze, a=algorithm: _solve_fresh(maze, a)))
+    cases.append(("draw", nothing, lambda _: _draw(size)))
+    cases.append(("render/png", built(), lambda maze: export.write_png(export.rasterize(maze, cell_size=2), io.BytesIO())))
+    cases.append(("render/svg", built(), lambda maze: export.to_svg(maze, cell_size=2)))
+    cases.append(("serialize/save", built(), _save))
+    cases.append(("serialize/load", _saved(built()), lambda path: Maze.load(path).grid.wall_bytes()))
+    cases.append(("serialize/text", built(), lambda maze: Maze.from_text(maze.to_text())))
+    return cases
+
+
+def _solve_fresh(maze, algorithm):
+    # clears the visited flags a previous run (e.g. the traced one) left
+    maze.grid.reset_visited()
+    return maze.solve(algorithm)
+
+
+def _draw(size):
+    # every cell drawn through Cell views onto a window that drops the lines
+    win = _NullWindow()
+    return Maze(0, 0, size, size, 10, 10, seed=SEED, algorithm="kruskal", renderer=Renderer(win, delay=0))
+
+
+def _save(maze):
+    with tempfile.TemporaryDirectory() as tmp:
+        maze.save(os.path.join(tmp, "bench.maze"))
+
+
+def _saved(build):
+    def setup():
+        handle, path = tempfile.mkstemp(suffix=".maze")
+        os.close(handle)
+        build().save(path)
+        return path
+    return setup
+
+
+def _measure(setup, run, repeat):
+    # best wall time of at least `repeat` runs, then peak traced bytes of one
+    # more (tracemalloc slows the run it watches, so it is never timed).
+    # Short cases keep running until MIN_TIMED seconds have been spent on
+    # them (up to MAX_REPEAT runs), since a few runs of a few milliseconds
+    # are mostly scheduler noise.
+    data = setup()
+    try:
+        best = None
+        runs = 0
+        total = 0.0
+        while runs < repeat or (total < MIN_TIMED and runs < MAX_REPEAT):
+            gc.collect()
+            started = time.perf_counter()
+            run(data)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+            runs += 1
+            total += elapsed
+        peak = _traced_peak(lambda: run(data))
+    finally:
+        if isinstance(data, str):
+            os.remove(data)
+    return best, peak
+
+
+def run_suite(sizes=SUITE_SIZES, cases=None, log=None):
+    # Machine-readable results: {"meta": {...}, "results": [{"case", "size",
+    # "seconds", "peak_bytes"}, ...]}. `cases` limits the run to case names
+    # starting with any of the given prefixes.
+    results = []
+    for size in sizes:
+        repeat = 3 if size <= 500 else 1
+        for name, setup, run in _suite_cases(size):
+            if cases and not any(name.startswith(prefix) for prefix in cases):
+                continue
+            seconds, peak = _measure(setup, run, repeat)
+            results.append({"case": name, "size": size, "seconds": seconds, "peak_bytes": peak})
+            if log is not None:
+                print(f"{f'{size}x{size}':>10} {name:>22} {seconds:>9.4f}s {peak / 2**20:>9.2f}MB", file=log)
+    meta = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "seed": SEED,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(results, baseline, time_threshold=0.25, memory_threshold=0.10, min_seconds=0.1, min_bytes=65536):
+    # Regressions against a stored baseline: a case is flagged when it got
+    # more than `time_threshold` slower or `memory_threshold` bigger. Timings
+    # under `min_seconds` in the baseline and memory growth under
+    # `min_bytes` are too noisy to judge. Cases missing on either side are
+    # skipped.
+    expected = {(entry["case"], entry["size"]): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results["results"]:
+        old = expected.get((entry["case"], entry["size"]))
+        if old is None:
+            continue
+        if old["seconds"] >= min_seconds and entry["seconds"] > old["seconds"] * (1 + time_threshold):
+            regressions.append((entry["case"], entry["size"], "seconds", old["seconds"], entry["seconds"]))
+        growth = entry["peak_bytes"] - old["peak_bytes"]
+        if growth > min_bytes and growth > old["peak_bytes"] * memory_threshold:
+            regressions.append((entry["case"], entry["size"], "peak_bytes", old["peak_bytes"], entry["peak_bytes"]))
+    return regressions
+
+
+def suite_main(args):
+    results = run_suite(args.sizes or SUITE_SIZES, args.cases, log=sys.stderr)
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(results, out, indent=1)
+            out.write("\n")
+    if args.no_compare:
+        return 0
+    try:
+        with open(args.baseline) as source:
+            baseline = json.load(source)
+    except FileNotFoundError:
+        print(f"no baseline at {args.baseline}; write one with --json", file=sys.stderr)
+        return 0
+    regressions = compare(results, baseline, args.time_threshold, args.memory_threshold, args.min_seconds)
+    for case, size, metric, old, new in regressions:
+        print(f"REGRESSION {case} {size}x{size} {metric}: {old:.4g} -> {new:.4g} ({new / old:.2f}x)")
+    if not regressions:
+        print("no regressions against the baseline")
+    return 1 if regressions else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Maze benchmarks.")
+    parser.add_argument("sizes", nargs="*", type=int, help="square side lengths")
+    parser.add_argument("--suite", action="store_true", help="run the regression suite instead of the tables")
+    parser.add_argument("--cases", nargs="*", help="suite case name prefixes, e.g. generate/ solve/bfs")
+    parser.add_argument("--json", help="write suite results to this file")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline results to compare against")
+    parser.add_argument("--no-compare", action="store_true", help="only measure, do not compare")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--memory-threshold", type=float, default=0.10, help="allowed peak memory growth")
+    parser.add_argument("--min-seconds", type=float, default=0.1, help="baseline timings below this are not judged")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    if args.suite:
+        return suite_main(args)
+    sizes = args.sizes or DEFAULT_SIZES
+    print(f"{'size':>10} {'cells':>10} {'gen s':>9} {'gen cells/s':>12} {'gen us/cell':>12} {'solve s':>9} {'solve cells/s':>14}")
+    for size in sizes:
+        cells = size * size
+        maze, gen_elapsed = bench_generate(size)
+        solve_elapsed, _ = bench_solve(maze)
+        print(f"{f'{size}x{size}':>10} {cells:>10} {gen_elapsed:>9.3f} {cells / gen_elapsed:>12,.0f} "
+              f"{gen_elapsed / cells * 1e6:>12.2f} "
+              f"{solve_elapsed:>9.3f} {cells / solve_elapsed:>14,.0f}")
+
+    print()
+    print(f"{'size':>10} {'generator':>14} {'seconds':>9} {'cells/s':>12}")
+    for size in sizes:
+        for algorithm in GENERATORS:
+            _, elapsed = bench_generate(size, algorithm=algorithm)
+            print(f"{f'{size}x{size}':>10} {algorithm:>14} {elapsed:>9.3f} {size * size / elapsed:>12,.0f}")
+
+    print()
+    print(f"{'size':>10} {'solver':>14} {'expanded':>10} {'seconds':>9}")
+    for size in sizes:
+        maze, _ = bench_generate(size)
+        for algorithm in SOLVERS:
+            elapsed, expanded = bench_solve(maze, algorithm)
+            print(f"{f'{size}x{size}':>10} {algorithm:>14} {expanded:>10} {elapsed:>9.3f}")
+
+    print()
+    print(f"{'width':>10} {'rows':>8} {'rows/s':>10} {'peak':>10}")
+    for width, heights in ((1_000, (100, 400)), (10_000, (20, 80)), (100_000, (4, 16))):
+        for height in heights:
+            rows_per_second, peak = bench_eller(width, height)
+            print(f"{width:>10} {height:>8} {rows_per_second:>10,.1f} {peak / 2**20:>8.2f}MB")
+
+    print()
+    print(f"{'size':>10} {'Cell objects':>14} {'packed grid':>14} {'ratio':>7}")
+    for size in sizes:
+        objects, packed = bench_memory(size)
+        print(f"{f'{size}x{size}':>10} {objects / 2**20:>12.1f}MB {packed / 2**20:>12.2f}MB {objects / packed:>6.0f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,65 @@
 from __future__ import annotations
 from window import Line, Point, Window
-import time
+from grid import Grid
 
 class Cell:
-    def __init__(self, win: Window=None):
-        self.has_left_wall = True
-        self.has_right_wall = True
-        self.has_top_wall = True
-        self.has_bottom_wall = True
-        self.visited = False
+    # A Cell is a lightweight view over one cell of a Grid; wall and visited
+    # state live in the grid's packed storage, only drawing coordinates are
+    # kept on the view. A Cell created without a grid gets its own 1x1 grid.
+    __slots__ = ("_grid", "_col", "_row", "_win", "__x1", "__x2", "__y1", "__y2")
+
+    def __init__(self, win: Window=None, grid: Grid=None, col=0, row=0):
+        if grid is None:
+            grid = Grid(1, 1)
+        self._grid = grid
+        self._col = col
+        self._row = row
         self.__x1 = -1
         self.__x2 = -1
         self.__y1 = -1
         self.__y2 = -1
         self._win = win
 
+    @property
+    def has_left_wall(self):
+        return self._grid.has_wall(self._col, self._row, "left")
+
+    @has_left_wall.setter
+    def has_left_wall(self, value):
+        self._grid.set_wall(self._col, self._row, "left", value)
+
+    @property
+    def has_right_wall(self):
+        return self._grid.has_wall(self._col, self._row, "right")
+
+    @has_right_wall.setter
+    def has_right_wall(self, value):
+        self._grid.set_wall(self._col, self._row, "right", value)
+
+    @property
+    def has_top_wall(self):
+        return self._grid.has_wall(self._col, self._row, "top")
+
+    @has_top_wall.setter
+    def has_top_wall(self, value):
+        self._grid.set_wall(self._col, self._row, "top", value)
+
+    @property
+    def has_bottom_wall(self):
+        return self._grid.has_wall(self._col, self._row, "bottom")
+
+    @has_bottom_wall.setter
+    def has_bottom_wall(self, value):
+        self._grid.set_wall(self._col, self._row, "bottom", value)
+
+    @property
+    def visited(self):
+        return self._grid.is_visited(self._col, self._row)
+
+    @visited.setter
+    def visited(self, value):
+        self._grid.set_visited(self._col, self._row, value)
+
     def get_center(self):
         size_x = self.__x2 - self.__x1
         size_y = self.__y2 - self.__y1
@@ -60,13 +105,42 @@ class Cell:
         point2 = to_cell.get_center()
         line = Line(point1, point2)
         self._win.draw_line(line, color)
-        # animate the move (redraw + short sleep) if the window supports it
-        try:
-            self._win.redraw()
-        except Exception:
-            pass
-        # keep the small delay for visible animation in UI runs
-        try:
-            time.sleep(0.05)
-        except Exception:
-            pass
\ No newline at end of file
+        # the frame redraw and delay are driven by the Maze's Renderer
+
+
+class CellGrid:
+    # Column-major ``cells[col][row]`` access to Cell views over a Grid.
+    # Views are created on first access and cached so the drawing
+    # coordinates assigned by Cell.draw stick to the cell.
+    def __init__(self, grid: Grid, win: Window=None):
+        self._grid = grid
+        self._win = win
+        self._views = {}
+
+    def __len__(self):
+        return self._grid.num_cols
+
+    def __getitem__(self, col):
+        col = range(self._grid.num_cols)[col]
+        return _CellColumn(self, col)
+
+    def cell(self, col, row):
+        key = (col, row)
+        view = self._views.get(key)
+        if view is None:
+            view = Cell(self._win, self._grid, col, row)
+            self._views[key] = view
+        return view
+
+
+class _CellColumn:
+    def __init__(self, cells: CellGrid, col):
+        self._cells = cells
+        self._col = col
+
+    def __len__(self):
+        return self._cells._grid.num_rows
+
+    def __getitem__(self, row):
+        row = range(self._cells._grid.num_rows)[row]
+        return self._cells.cell(self._col, row)
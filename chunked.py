@@ -0,0 +1,153 @@
+from __future__ import annotations
+from collections import OrderedDict
+from functools import lru_cache
+from generators import GENERATORS
+from grid import Grid, SIDES, WALL_RIGHT, WALL_BOTTOM
+from solvers import SolveResult, solve as run_solver
+import random
+
+# An unbounded maze generated on demand, chunk by chunk.
+#
+# The plane is cut into chunk_size x chunk_size chunks. The first time a
+# chunk is touched it is carved as a perfect maze with its own generator
+# seeded from (seed, chunk_x, chunk_y), so it comes out the same however
+# often it is evicted and rebuilt. Every pair of neighbouring chunks shares
+# exactly one opening in their common border, at a position derived from
+# (seed, the pair) alone; both sides therefore agree on it without either
+# chunk being generated. Chunks are joined in a grid, so the maze is
+# connected but has loops at chunk scale.
+#
+# Generated chunks live in an LRU cache of `cache_size` chunks, so memory
+# stays flat however far a walk goes. Coordinates may be negative.
+#
+# Cells are read with the same has_wall(col, row, side) as Grid, and
+# open_neighbors(col, row) lists the cells a walk can step to. Solvers never
+# run on a ChunkedMaze directly: they go through region(), which copies any
+# finite window into a regular Grid (also what exporters, the viewport and
+# the tree index take), and solve() does that around two cells.
+
+
+@lru_cache(maxsize=65536)
+def _opening(seed, kind, chunk_x, chunk_y, size):
+    # offset of the single opening in the right ("v") or bottom ("h") border
+    # of chunk (chunk_x, chunk_y)
+    return random.Random(f"{seed}/{kind}/{chunk_x}/{chunk_y}").randrange(size)
+
+
+class ChunkedMaze:
+    def __init__(self, seed=None, chunk_size=64, cache_size=256, algorithm="dfs"):
+        if algorithm not in GENERATORS:
+            raise ValueError(f"unknown generator {algorithm!r}; expected one of {sorted(GENERATORS)}")
+        if chunk_size <= 0 or cache_size <= 0:
+            raise ValueError("chunk_size and cache_size must be positive")
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**32)
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.algorithm = algorithm
+        self._chunks = OrderedDict()
+        self.generated = 0
+        self.evicted = 0
+
+    def __len__(self):
+        # chunks currently cached
+        return len(self._chunks)
+
+    def chunk(self, chunk_x, chunk_y):
+        # the Grid of one chunk, generating it (and evicting the least
+        # recently used chunk) on a miss
+        key = (chunk_x, chunk_y)
+        chunks = self._chunks
+        grid = chunks.get(key)
+        if grid is not None:
+            chunks.move_to_end(key)
+            return grid
+        size = self.chunk_size
+        grid = Grid(size, size)
+        GENERATORS[self.algorithm](grid, random.Random(f"{self.seed}/{chunk_x}/{chunk_y}"))
+        grid.reset_visited()
+        # this chunk owns its right and bottom borders; open their doors
+        cells = grid.cells
+        row = _opening(self.seed, "v", chunk_x, chunk_y, size)
+        cells[row * size + size - 1] &= ~WALL_RIGHT
+        col = _opening(self.seed, "h", chunk_x, chunk_y, size)
+        cells[(size - 1) * size + col] &= ~WALL_BOTTOM
+        chunks[key] = grid
+        self.generated += 1
+        if len(chunks) > self.cache_size:
+            chunks.popitem(last=False)
+            self.evicted += 1
+        return grid
+
+    def has_wall(self, col, row, side):
+        # like Grid.has_wall, for any cell of the plane. Left and top walls
+        # belong to the neighbouring cell, as in Grid.
+        if side == "left":
+            col -= 1
+            side = "right"
+        elif side == "top":
+            row -= 1
+            side = "bottom"
+        elif side not in SIDES:
+            raise ValueError(f"unknown side {side!r}; expected one of {SIDES}")
+        size = self.chunk_size
+        chunk_x, local_col = divmod(col, size)
+        chunk_y, local_row = divmod(row, size)
+        bit = WALL_RIGHT if side == "right" else WALL_BOTTOM
+        return bool(self.chunk(chunk_x, chunk_y).cells[local_row * size + local_col] & bit)
+
+    def open_neighbors(self, col, row):
+        # (col, row) of the open neighbours, right, bottom, left, top; unlike
+        # Grid.neighbors this takes and returns coordinates, not indices
+        result = []
+        if not self.has_wall(col, row, "right"):
+            result.append((col + 1, row))
+        if not self.has_wall(col, row, "bottom"):
+            result.append((col, row + 1))
+        if not self.has_wall(col, row, "left"):
+            result.append((col - 1, row))
+        if not self.has_wall(col, row, "top"):
+            result.append((col, row - 1))
+        return result
+
+    def region(self, col, row, num_cols, num_rows):
+        # Copy the num_cols x num_rows window with top-left cell (col, row)
+        # into a Grid. Walls on the window's edge are the maze's own, so a
+        # passage leading out of the window shows as an open border.
+        size = self.chunk_size
+        grid = Grid(num_cols, num_rows)
+        cells = grid.cells
+        # chunk by chunk, so each one is fetched once even when a row of the
+        # window spans more chunks than the cache holds
+        for chunk_y in range(row // size, (row + num_rows - 1) // size + 1):
+            top = max(row, chunk_y * size)
+            bottom = min(row + num_rows, (chunk_y + 1) * size)
+            for chunk_x in range(col // size, (col + num_cols - 1) // size + 1):
+                left = max(col, chunk_x * size)
+                right = min(col + num_cols, (chunk_x + 1) * size)
+                source = self.chunk(chunk_x, chunk_y).cells
+                for r in range(top, bottom):
+                    start = (r - chunk_y * size) * size + left - chunk_x * size
+                    out = (r - row) * num_cols + left - col
+                    cells[out:out + right - left] = source[start:start + right - left]
+        grid.left[:] = bytes(self.has_wall(col, row + r, "left") for r in range(num_rows))
+        grid.top[:] = bytes(self.has_wall(col + c, row, "top") for c in range(num_cols))
+        return grid
+
+    def solve(self, start, goal, algorithm="bfs", margin=None):
+        # Solve inside the bounding box of start and goal grown by `margin`
+        # cells (a chunk by default). Paths that would have to leave the box
+        # are not found; widen the margin if that matters.
+        if margin is None:
+            margin = self.chunk_size
+        col = min(start[0], goal[0]) - margin
+        row = min(start[1], goal[1]) - margin
+        num_cols = abs(start[0] - goal[0]) + 1 + 2 * margin
+        num_rows = abs(start[1] - goal[1]) + 1 + 2 * margin
+        grid = self.region(col, row, num_cols, num_rows)
+        result = run_solver(
+            grid, algorithm, (start[0] - col, start[1] - row), (goal[0] - col, goal[1] - row)
+        )
+        path = [(c + col, r + row) for c, r in result.path]
+        return SolveResult(result.algorithm, path, result.expanded, result.elapsed)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+from array import array
+from collections import OrderedDict
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM
+
+# Breadth-first distance fields: the number of moves from every cell to the
+# nearest of one or more source cells, computed in one pass. One field
+# answers any number of "how far is X from the source" queries in O(1) and
+# "show me the way" queries in O(path length), and doubles as a heatmap.
+#
+# DistanceCache keeps the most recently used fields, keyed by their source
+# set, up to `max_fields`; it empties itself when Grid.version shows a wall
+# changed. query() answers a batch of (start, goal) pairs with one field per
+# distinct goal (or per distinct start, if there are fewer of those).
+
+
+class DistanceField:
+    def __init__(self, grid: Grid, sources):
+        # sources are (col, row) cells
+        self.grid = grid
+        self.sources = tuple(sorted(set(sources)))
+        if not self.sources:
+            raise ValueError("a distance field needs at least one source")
+        self.version = grid.version
+        self.distances = _bfs(grid, [grid.index(*source) for source in self.sources])
+
+    def distance(self, col, row):
+        # moves from (col, row) to the nearest source, None if unreachable
+        d = self.distances[row * self.grid.num_cols + col]
+        return None if d < 0 else d
+
+    def path(self, col, row):
+        # (col, row) cells from (col, row) to the nearest source, empty if
+        # unreachable; each step goes to a neighbour one move closer
+        grid = self.grid
+        distances = self.distances
+        i = grid.index(col, row)
+        if distances[i] < 0:
+            return []
+        path = [i]
+        while distances[i]:
+            i = next(j for j in grid.neighbors(i) if distances[j] == distances[i] - 1)
+            path.append(i)
+        return [grid.position(i) for i in path]
+
+    def farthest(self):
+        # ((col, row), distance) of a cell farthest from the sources
+        distances = self.distances
+        best = max(distances)
+        return self.grid.position(distances.index(best)), best
+
+    @property
+    def stale(self):
+        # True once a wall has changed since the field was computed
+        return self.version != self.grid.version
+
+
+def _bfs(grid: Grid, sources):
+    # Level-synchronous BFS over the wall bits: each level is a flat list of
+    # cell indices, expanded with the neighbour tests inlined.
+    cells = grid.cells
+    cols = grid.num_cols
+    n = len(cells)
+    distances = [-1] * n
+    frontier = []
+    for i in sources:
+        if distances[i] < 0:
+            distances[i] = 0
+            frontier.append(i)
+    d = 0
+    while frontier:
+        d += 1
+        next_frontier = []
+        append = next_frontier.append
+        for i in frontier:
+            bits = cells[i]
+            if not bits & WALL_RIGHT and (i + 1) % cols and distances[i + 1] < 0:
+                distances[i + 1] = d
+                append(i + 1)
+            if not bits & WALL_BOTTOM and i + cols < n and distances[i + cols] < 0:
+                distances[i + cols] = d
+                append(i + cols)
+            if i % cols and not cells[i - 1] & WALL_RIGHT and distances[i - 1] < 0:
+                distances[i - 1] = d
+                append(i - 1)
+            if i >= cols and not cells[i - cols] & WALL_BOTTOM and distances[i - cols] < 0:
+                distances[i - cols] = d
+                append(i - cols)
+        frontier = next_frontier
+    return array("i", distances)
+
+
+class DistanceCache:
+    def __init__(self, grid: Grid, max_fields=8):
+        if max_fields < 1:
+            raise ValueError("max_fields must be at least 1")
+        self.grid = grid
+        self.max_fields = max_fields
+        self._fields = OrderedDict()
+        self._version = grid.version
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._fields)
+
+    def field(self, *sources):
+        # the DistanceField for these (col, row) sources, cached
+        if self.grid.version != self._version:
+            self._fields.clear()
+            self._version = self.grid.version
+        key = tuple(sorted(set(sources)))
+        fields = self._fields
+        field = fields.get(key)
+        if field is not None:
+            fields.move_to_end(key)
+            self.hits += 1
+            return field
+        self.misses += 1
+        field = fields[key] = DistanceField(self.grid, key)
+        if len(fields) > self.max_fields:
+            fields.popitem(last=False)
+        return field
+
+    def query(self, pairs):
+        # distances for a batch of ((col, row), (col, row)) pairs, in order;
+        # None where the two cells are not connected
+        pairs = list(pairs)
+        starts = {start for start, _ in pairs}
+        goals = {goal for _, goal in pairs}
+        # moves are reversible, so fields can hang off whichever end has
+        # fewer distinct cells
+        by_goal = len(goals) <= len(starts)
+        groups = {}
+        for k, (start, goal) in enumerate(pairs):
+            source, target = (goal, start) if by_goal else (start, goal)
+            groups.setdefault(source, []).append((k, target))
+        results = [None] * len(pairs)
+        for source, members in groups.items():
+            field = self.field(source)
+            for k, (col, row) in members:
+                results[k] = field.distance(col, row)
+        return results
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+# Step events yielded by the resumable generation/solving generators. Each
+# event is a tuple (op, col, row, direction): the cell it happened at and,
+# for CARVE/MOVE/UNDO, the direction of the neighbour involved.
+
+# wall between (col, row) and its neighbour in `direction` knocked out
+CARVE = 0
+# carving backtracked past (col, row); the cell is final and can be drawn
+DONE = 1
+# the solver moved from (col, row) to its neighbour in `direction`
+MOVE = 2
+# the solver backed out of the move from (col, row) towards `direction`
+UNDO = 3
+
+RIGHT = 0
+DOWN = 1
+LEFT = 2
+UP = 3
+
+# (dcol, drow) per direction
+DELTAS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+# Events packed into one unsigned 64-bit integer for compact logs (see
+# replay.EventLog): op in bits 0-1, direction in bits 2-3, col in bits 4-33
+# and row from bit 34 up.
+DIRECTION_SHIFT = 2
+COL_SHIFT = 4
+ROW_SHIFT = 34
+OP_MASK = (1 << DIRECTION_SHIFT) - 1
+DIRECTION_MASK = (1 << (COL_SHIFT - DIRECTION_SHIFT)) - 1
+COORD_MASK = (1 << (ROW_SHIFT - COL_SHIFT)) - 1
+
+
+def pack(op, col, row, direction):
+    if not (0 <= col <= COORD_MASK and 0 <= row <= COORD_MASK):
+        raise ValueError(f"cell ({col}, {row}) does not fit an event record")
+    return op | direction << DIRECTION_SHIFT | col << COL_SHIFT | row << ROW_SHIFT
+
+
+def pack_many(events):
+    # pack() over a stream of events, lazily and without the range check;
+    # for callers that have already bounded the coordinates
+    return (
+        op | direction << DIRECTION_SHIFT | col << COL_SHIFT | row << ROW_SHIFT
+        for op, col, row, direction in events
+    )
+
+
+def unpack(record):
+    # the (op, col, row, direction) tuple packed by pack()
+    return (
+        record & OP_MASK,
+        record >> COL_SHIFT & COORD_MASK,
+        record >> ROW_SHIFT,
+        record >> DIRECTION_SHIFT & DIRECTION_MASK,
+    )
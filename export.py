@@ -0,0 +1,260 @@
+from __future__ import annotations
+from grid import Grid, BOTTOM_FLAGS, RIGHT_FLAGS, flag_runs
+import struct
+import sys
+import zlib
+
+# Offscreen rendering: rasterizes the wall grid (and optionally a solution
+# path) straight into a pixel buffer, no tkinter or display needed. Pixels
+# are palette indices, one byte each.
+BACKGROUND = 0
+WALL = 1
+PATH = 2
+PALETTE = ((255, 255, 255), (0, 0, 0), (220, 0, 0))
+
+
+class Raster:
+    def __init__(self, width, height, pixels=None):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(width * height) if pixels is None else pixels
+
+    def rgb(self):
+        # expand palette indices to packed RGB, one channel at a time
+        rgb = bytearray(len(self.pixels) * 3)
+        for channel in range(3):
+            table = bytes(PALETTE[i][channel] if i < len(PALETTE) else 0 for i in range(256))
+            rgb[channel::3] = self.pixels.translate(table)
+        return rgb
+
+
+def _geometry(maze, cell_size=None, margin=None):
+    # (x0, y0, cell width, cell height, image width, image height). By default
+    # this is the on-screen layout Maze uses for drawing (Maze.cell_bounds /
+    # Maze.canvas_size); cell_size/margin give a compact layout for mazes
+    # too large to render at their window scale.
+    if cell_size is None:
+        x0, _, y0, _ = maze.cell_bounds(0, 0)
+        width, height = maze.canvas_size()
+        return int(x0), int(y0), int(maze.cell_size_x), int(maze.cell_size_y), int(width) + 1, int(height) + 1
+    if margin is None:
+        margin = cell_size
+    width = 2 * margin + maze.num_cols * cell_size + 1
+    height = 2 * margin + maze.num_rows * cell_size + 1
+    return margin, margin, cell_size, cell_size, width, height
+
+
+def _or_into(buffer, index, flags):
+    # buffer[index] |= flags elementwise, for an extended slice `index`
+    current = buffer[index]
+    buffer[index] = (int.from_bytes(current, "big") | int.from_bytes(flags, "big")).to_bytes(len(current), "big")
+
+
+def _wall_flags(grid: Grid):
+    # Per-boundary wall flags (one byte, 0 or 1, per cell along the line):
+    # horizontal[r] for the line above cell row r (r == num_rows is the
+    # bottom border), vertical[r] for the num_cols + 1 vertical lines
+    # crossing cell row r.
+    cols = grid.num_cols
+    rows = grid.num_rows
+    cells = grid.cells
+    horizontal = [bytes(grid.top)]
+    vertical = []
+    for row in range(rows):
+        start = row * cols
+        line = bytes(cells[start:start + cols])
+        horizontal.append(line.translate(BOTTOM_FLAGS))
+        vertical.append(bytes([grid.left[row]]) + line.translate(RIGHT_FLAGS))
+    return horizontal, vertical
+
+
+def rasterize(maze, path=None, cell_size=None, margin=None):
+    # Builds the image scanline by scanline: every pixel row inside a cell
+    # row is the same run of vertical-wall pixels, and every boundary row is
+    # the horizontal walls expanded to cell width with strided slice
+    # assignment, so the work is O(rows * cell size) slice operations rather
+    # than one per wall.
+    grid = maze.grid
+    cols = grid.num_cols
+    x0, y0, sx, sy, width, height = _geometry(maze, cell_size, margin)
+    raster = Raster(width, height)
+    pixels = raster.pixels
+    horizontal, vertical = _wall_flags(grid)
+    # strided index of the wall pixel at x = x0 + c * sx for c in 0..cols
+    posts = slice(x0, x0 + cols * sx + 1, sx)
+
+    for row in range(grid.num_rows):
+        scan = bytearray(width)
+        scan[posts] = vertical[row]
+        scan = bytes(scan)
+        top = y0 + row * sy
+        for y in range(top + 1, top + sy):
+            pixels[y * width:(y + 1) * width] = scan
+
+    for boundary, flags in enumerate(horizontal):
+        scan = bytearray(width)
+        # a wall from x0 + c * sx to x0 + (c + 1) * sx, inclusive
+        for j in range(sx):
+            scan[x0 + j:x0 + j + cols * sx:sx] = flags
+        _or_into(scan, slice(x0 + sx, x0 + sx + cols * sx, sx), flags)
+        # vertical walls run through the boundary rows above and below them
+        if boundary > 0:
+            _or_into(scan, posts, vertical[boundary - 1])
+        if boundary < grid.num_rows:
+            _or_into(scan, posts, vertical[boundary])
+        y = y0 + boundary * sy
+        pixels[y * width:(y + 1) * width] = scan
+
+    if path:
+        _draw_path(raster, path, x0, y0, sx, sy)
+    return raster
+
+
+def _merged_segments(path):
+    # collapse consecutive moves in the same direction into one segment
+    if len(path) < 2:
+        return
+    start = path[0]
+    previous = path[0]
+    direction = None
+    for point in path[1:]:
+        step = (point[0] - previous[0], point[1] - previous[1])
+        if direction is not None and step != direction:
+            yield start, previous
+            start = previous
+        direction = step
+        previous = point
+    yield start, previous
+
+
+def _draw_path(raster, path, x0, y0, sx, sy):
+    pixels = raster.pixels
+    width = raster.width
+    for (c1, r1), (c2, r2) in _merged_segments(path):
+        xa, xb = sorted((x0 + c1 * sx + sx // 2, x0 + c2 * sx + sx // 2))
+        ya, yb = sorted((y0 + r1 * sy + sy // 2, y0 + r2 * sy + sy // 2))
+        if ya == yb:
+            pixels[ya * width + xa:ya * width + xb + 1] = bytes([PATH]) * (xb - xa + 1)
+        else:
+            pixels[ya * width + xa:yb * width + xa + 1:width] = bytes([PATH]) * (yb - ya + 1)
+
+
+def _open_binary(target):
+    # accept a filename or an already open binary file object
+    if hasattr(target, "write"):
+        return target, False
+    return open(target, "wb"), True
+
+
+def write_ppm(raster: Raster, target):
+    out, owned = _open_binary(target)
+    try:
+        out.write(b"P6\n%d %d\n255\n" % (raster.width, raster.height))
+        out.write(raster.rgb())
+    finally:
+        if owned:
+            out.close()
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def write_png(raster: Raster, target, level=1):
+    # 8-bit palette PNG; every scanline uses filter type 0. Maze images are
+    # mostly long runs, so fast compression already does well.
+    width = raster.width
+    pixels = raster.pixels
+    scanlines = b"".join(b"\x00" + pixels[y * width:(y + 1) * width] for y in range(raster.height))
+    header = struct.pack(">IIBBBBB", width, raster.height, 8, 3, 0, 0, 0)
+    palette = b"".join(bytes(color) for color in PALETTE)
+    out, owned = _open_binary(target)
+    try:
+        out.write(b"\x89PNG\r\n\x1a\n")
+        out.write(_png_chunk(b"IHDR", header))
+        out.write(_png_chunk(b"PLTE", palette))
+        out.write(_png_chunk(b"IDAT", zlib.compress(scanlines, level)))
+        out.write(_png_chunk(b"IEND", b""))
+    finally:
+        if owned:
+            out.close()
+
+
+def _svg_chunks(draw, hop):
+    # Path commands for every 8-cell stretch of a boundary line, keyed by its
+    # 8 flag bytes read as one native-order 64-bit word. Each entry starts
+    # where the previous stretch ended and moves the pen to its own end.
+    table = {}
+    for bits in range(256):
+        flags = bytes(bits >> k & 1 for k in range(8))
+        commands = []
+        pen = 0
+        for start, end in flag_runs(flags):
+            if start > pen:
+                commands.append(hop(start - pen))
+            commands.append(draw(end - start))
+            pen = end
+        if pen < 8:
+            commands.append(hop(8 - pen))
+        table[int.from_bytes(flags, sys.byteorder)] = "".join(commands)
+    return table
+
+
+def _svg_line(table, flags):
+    # the commands for one boundary line; trailing gaps are left out
+    flags = flags.rstrip(b"\x00")
+    flags += bytes(-len(flags) % 8)
+    return "".join(map(table.__getitem__, memoryview(flags).cast("Q")))
+
+
+def to_svg(maze, path=None, cell_size=None, margin=None):
+    # Compact SVG: the walls are one <path>. Each boundary line starts with
+    # one absolute "M"; from there runs of walls are "h"/"v" commands and the
+    # gaps between them relative "m" moves. Lines are translated 8 cells at
+    # a time through a table of precomputed commands, so there is no Python
+    # work per wall; a run crossing from one stretch into the next is drawn
+    # as two commands.
+    grid = maze.grid
+    x0, y0, sx, sy, width, height = _geometry(maze, cell_size, margin)
+    horizontal, vertical = _wall_flags(grid)
+    commands = []
+    append = commands.append
+    table = _svg_chunks(lambda k: f"h{k * sx}", lambda k: f"m{k * sx} 0")
+    for boundary, flags in enumerate(horizontal):
+        line = _svg_line(table, flags)
+        if line:
+            append(f"M{x0} {y0 + boundary * sy}{line}")
+    table = _svg_chunks(lambda k: f"v{k * sy}", lambda k: f"m0 {k * sy}")
+    stride = grid.num_cols + 1
+    columns = b"".join(vertical)
+    for col in range(stride):
+        line = _svg_line(table, columns[col::stride])
+        if line:
+            append(f"M{x0 + col * sx} {y0}{line}")
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+        f'<path d="{"".join(commands)}" stroke="black" stroke-width="2" stroke-linecap="square" fill="none"/>',
+    ]
+    if path:
+        points = [path[0]] + [end for _, end in _merged_segments(path)]
+        coords = " ".join(f"{x0 + c * sx + sx / 2:g},{y0 + r * sy + sy / 2:g}" for c, r in points)
+        parts.append(f'<polyline points="{coords}" stroke="red" stroke-width="2" fill="none"/>')
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
+
+
+def export(maze, filename, path=None, cell_size=None, margin=None):
+    # write .ppm, .png or .svg depending on the file extension
+    lower = str(filename).lower()
+    if lower.endswith(".svg"):
+        with open(filename, "w") as out:
+            out.write(to_svg(maze, path, cell_size, margin))
+        return
+    raster = rasterize(maze, path, cell_size, margin)
+    if lower.endswith(".ppm"):
+        write_ppm(raster, filename)
+    elif lower.endswith(".png"):
+        write_png(raster, filename)
+    else:
+        raise ValueError(f"unsupported export format for {filename!r}; use .ppm, .png or .svg")
@@ -0,0 +1,335 @@
+from __future__ import annotations
+from collections import deque
+from events import CARVE, DONE, RIGHT, DOWN, LEFT, UP
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM, VISITED
+
+# Every generator takes (grid, rng) and carves a perfect maze into a grid
+# whose interior walls are all still standing. `rng` is anything with the
+# random.Random interface (randrange, shuffle, randbytes). Border walls,
+# including the entrance and exit, are left alone.
+
+# masks ANDed into a cell byte to knock out one of its walls
+_OPEN_RIGHT = 0xFF ^ WALL_RIGHT
+_OPEN_BOTTOM = 0xFF ^ WALL_BOTTOM
+
+# translate() tables keyed by a random byte
+_LOW_BIT = bytes(b & 1 for b in range(256))
+_BINARY_TREE_MASK = bytes(_OPEN_RIGHT if b & 1 else _OPEN_BOTTOM for b in range(256))
+_SIDEWINDER_MASK = bytes(0xFF if b else _OPEN_RIGHT for b in range(256))
+# turns a streamed row of wall bits into a mask that keeps every other bit
+_ROW_TO_MASK = bytes(b | (0xFF ^ (WALL_RIGHT | WALL_BOTTOM)) for b in range(256))
+
+
+def _apply_mask(grid: Grid, mask):
+    # AND a per-cell mask into the whole grid in one big-integer operation
+    n = len(grid.cells)
+    grid.cells[:] = (int.from_bytes(grid.cells, "big") & int.from_bytes(mask, "big")).to_bytes(n, "big")
+
+
+def dfs_steps(grid: Grid, rng, start=(0, 0)):
+    # Randomized depth-first carve with an explicit stack, as a resumable
+    # step generator yielding events.CARVE / events.DONE tuples. The top
+    # entry plays the role of a recursive call frame, so for a given seed the
+    # layout matches the original recursive generator. Leaves the VISITED bit
+    # set on every cell.
+    cells = grid.cells
+    num_cols = grid.num_cols
+    num_rows = grid.num_rows
+    i = grid.index(*start)
+    cells[i] |= VISITED
+    stack = [i]
+    while stack:
+        i = stack[-1]
+        row, col = divmod(i, num_cols)
+        # candidates are (index, owner index, wall bit, direction): the
+        # shared wall is cleared on the cell that owns it
+        next_index_list = []
+
+        # left
+        if col > 0 and not cells[i - 1] & VISITED:
+            next_index_list.append((i - 1, i - 1, WALL_RIGHT, LEFT))
+        # right
+        if col < num_cols - 1 and not cells[i + 1] & VISITED:
+            next_index_list.append((i + 1, i, WALL_RIGHT, RIGHT))
+        # up
+        if row > 0 and not cells[i - num_cols] & VISITED:
+            next_index_list.append((i - num_cols, i - num_cols, WALL_BOTTOM, UP))
+        # down
+        if row < num_rows - 1 and not cells[i + num_cols] & VISITED:
+            next_index_list.append((i + num_cols, i, WALL_BOTTOM, DOWN))
+
+        # nowhere to go from here: pop back to the previous cell on the path
+        if not next_index_list:
+            stack.pop()
+            yield (DONE, col, row, 0)
+            continue
+
+        next_index, owner, wall, direction = next_index_list[rng.randrange(len(next_index_list))]
+        cells[owner] &= ~wall
+        cells[next_index] |= VISITED
+        stack.append(next_index)
+        yield (CARVE, col, row, direction)
+
+
+def dfs(grid: Grid, rng, start=(0, 0)):
+    # run the step generator to completion at C speed
+    deque(dfs_steps(grid, rng, start), maxlen=0)
+
+
+def _find(parents, i):
+    # path halving: every other node on the way up is re-pointed at its
+    # grandparent, which keeps the trees almost flat
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def kruskal(grid: Grid, rng):
+    # Walls are encoded as index * 2 (right wall) or index * 2 + 1 (bottom
+    # wall) so the shuffled edge list is a flat list of ints.
+    cells = grid.cells
+    num_cols = grid.num_cols
+    n = len(cells)
+    edges = [i * 2 for i in range(n) if i % num_cols != num_cols - 1]
+    edges.extend(i * 2 + 1 for i in range(n - num_cols))
+    rng.shuffle(edges)
+    parents = list(range(n))
+    sizes = [1] * n
+    remaining = n - 1
+    for edge in edges:
+        i, is_bottom = divmod(edge, 2)
+        j = i + num_cols if is_bottom else i + 1
+        root_i = _find(parents, i)
+        root_j = _find(parents, j)
+        if root_i == root_j:
+            continue
+        # union by size
+        if sizes[root_i] < sizes[root_j]:
+            root_i, root_j = root_j, root_i
+        parents[root_j] = root_i
+        sizes[root_i] += sizes[root_j]
+        cells[i] &= _OPEN_BOTTOM if is_bottom else _OPEN_RIGHT
+        remaining -= 1
+        if not remaining:
+            break
+
+
+def _adjacent(i, num_cols, num_rows):
+    row, col = divmod(i, num_cols)
+    result = []
+    if col > 0:
+        result.append(i - 1)
+    if col < num_cols - 1:
+        result.append(i + 1)
+    if row > 0:
+        result.append(i - num_cols)
+    if row < num_rows - 1:
+        result.append(i + num_cols)
+    return result
+
+
+def _carve(cells, num_cols, i, j):
+    # knock out the wall shared by adjacent cells i and j; it is owned by the
+    # lower index
+    if i > j:
+        i, j = j, i
+    cells[i] &= _OPEN_BOTTOM if j - i == num_cols else _OPEN_RIGHT
+
+
+def prim(grid: Grid, rng):
+    # Randomized Prim: grow one tree by attaching a random frontier cell to
+    # a random neighbour already in the maze.
+    cells = grid.cells
+    num_cols = grid.num_cols
+    num_rows = grid.num_rows
+    OUT, FRONTIER, IN = 0, 1, 2
+    state = bytearray(len(cells))
+    start = rng.randrange(len(cells))
+    state[start] = IN
+    frontier = []
+    for j in _adjacent(start, num_cols, num_rows):
+        state[j] = FRONTIER
+        frontier.append(j)
+    while frontier:
+        # swap-remove a random frontier cell
+        k = rng.randrange(len(frontier))
+        frontier[k], frontier[-1] = frontier[-1], frontier[k]
+        i = frontier.pop()
+        neighbours = _adjacent(i, num_cols, num_rows)
+        inside = [j for j in neighbours if state[j] == IN]
+        _carve(cells, num_cols, i, inside[rng.randrange(len(inside))])
+        state[i] = IN
+        for j in neighbours:
+            if state[j] == OUT:
+                state[j] = FRONTIER
+                frontier.append(j)
+
+
+def wilson(grid: Grid, rng):
+    # Wilson's algorithm: loop-erased random walks from each cell not yet in
+    # the tree. Produces a uniformly random spanning tree. `exits[i]` holds
+    # the cell the walk last moved to from cell i, so revisiting a cell
+    # overwrites (erases) the loop.
+    cells = grid.cells
+    num_cols = grid.num_cols
+    num_rows = grid.num_rows
+    n = len(cells)
+    in_tree = bytearray(n)
+    in_tree[rng.randrange(n)] = 1
+    exits = [0] * n
+    for start in range(n):
+        if in_tree[start]:
+            continue
+        i = start
+        while not in_tree[i]:
+            options = _adjacent(i, num_cols, num_rows)
+            exits[i] = options[rng.randrange(len(options))]
+            i = exits[i]
+        i = start
+        while not in_tree[i]:
+            in_tree[i] = 1
+            _carve(cells, num_cols, i, exits[i])
+            i = exits[i]
+
+
+def binary_tree(grid: Grid, rng):
+    # Each cell opens either its right or its bottom wall, chosen from one
+    # random byte per cell; cells on the right border must go down and cells
+    # on the bottom border must go right. The whole grid is carved with a
+    # single mask.
+    num_cols = grid.num_cols
+    num_rows = grid.num_rows
+    n = len(grid.cells)
+    mask = bytearray(rng.randbytes(n).translate(_BINARY_TREE_MASK))
+    mask[num_cols - 1::num_cols] = bytes([_OPEN_BOTTOM]) * num_rows
+    mask[n - num_cols:] = bytes([_OPEN_RIGHT]) * num_cols
+    mask[n - 1] = 0xFF
+    _apply_mask(grid, mask)
+
+
+def sidewinder(grid: Grid, rng):
+    # Each row is split into runs carved eastwards; every run then opens the
+    # bottom wall of one random member. Run ends come from one random byte per
+    # cell and the east carving is applied with a single mask; only the
+    # per-run choice of the downward opening is a Python loop.
+    num_cols = grid.num_cols
+    num_rows = grid.num_rows
+    n = len(grid.cells)
+    # close[i] == 1 ends the current run at cell i
+    close = bytearray(rng.randbytes(n).translate(_LOW_BIT))
+    close[num_cols - 1::num_cols] = b"\x01" * num_rows
+    mask = bytearray(close.translate(_SIDEWINDER_MASK))
+    # the bottom row is one long run carved all the way east
+    mask[n - num_cols:] = bytes([_OPEN_RIGHT]) * num_cols
+    mask[n - 1] = 0xFF
+    random = rng.random
+    find = close.find
+    for row_start in range(0, n - num_cols, num_cols):
+        row_end = row_start + num_cols
+        run_start = row_start
+        while run_start < row_end:
+            run_end = find(1, run_start, row_end) + 1
+            mask[run_start + int(random() * (run_end - run_start))] &= _OPEN_BOTTOM
+            run_start = run_end
+    _apply_mask(grid, mask)
+
+
+def eller_rows(width, height, rng):
+    # Eller's algorithm as a stream: yields one row at a time as `width`
+    # bytes of WALL_RIGHT/WALL_BOTTOM bits (the same per-cell layout as
+    # Grid.cells). Only the current row's set labels are kept, so memory is
+    # O(width) however tall the maze is.
+    labels = list(range(width))
+    next_label = width
+    for row in range(height):
+        last = row == height - 1
+        walls = bytearray([WALL_RIGHT | WALL_BOTTOM]) * width
+        # union-find over the labels present in this row
+        parents = {}
+
+        def find(label):
+            root = label
+            while root in parents:
+                root = parents[root]
+            while label != root:
+                parents[label], label = root, parents[label]
+            return root
+
+        # randomly join adjacent cells from different sets; the last row
+        # joins all of them so the maze ends up connected
+        joins = rng.randbytes(width)
+        root = find(labels[0])
+        for col in range(width - 1):
+            next_root = find(labels[col + 1])
+            if next_root != root and (last or joins[col] & 1):
+                parents[next_root] = root
+                walls[col] &= _OPEN_RIGHT
+            else:
+                root = next_root
+        if last:
+            yield bytes(walls)
+            return
+        roots = [find(label) for label in labels]
+
+        # open some bottom walls at random, then make sure every set has at
+        # least one way down
+        downs = rng.randbytes(width)
+        has_down = set()
+        for col in range(width):
+            if downs[col] & 1:
+                walls[col] &= _OPEN_BOTTOM
+                has_down.add(roots[col])
+        stranded = {}
+        for col, root in enumerate(roots):
+            if root not in has_down:
+                stranded.setdefault(root, []).append(col)
+        for members in stranded.values():
+            walls[members[rng.randrange(len(members))]] &= _OPEN_BOTTOM
+        yield bytes(walls)
+
+        # cells below an opening stay in their set; the rest start new sets
+        for col in range(width):
+            if walls[col] & WALL_BOTTOM:
+                labels[col] = next_label
+                next_label += 1
+            else:
+                labels[col] = roots[col]
+
+
+def write_rows(rows, sink):
+    # Stream rows (e.g. from eller_rows) to a file-like object with write()
+    # or a socket-like object with sendall(). Returns the number of rows.
+    send = getattr(sink, "sendall", None) or sink.write
+    count = 0
+    for row in rows:
+        send(row)
+        count += 1
+    return count
+
+
+def eller(grid: Grid, rng):
+    # Eller's algorithm written into a grid row by row
+    mask = bytearray()
+    for row in eller_rows(grid.num_cols, grid.num_rows, rng):
+        mask += row.translate(_ROW_TO_MASK)
+    _apply_mask(grid, mask)
+
+
+GENERATORS = {
+    "dfs": dfs,
+    "kruskal": kruskal,
+    "prim": prim,
+    "wilson": wilson,
+    "binary_tree": binary_tree,
+    "sidewinder": sidewinder,
+    "eller": eller,
+}
+
+
+def generate(grid: Grid, rng, algorithm="dfs"):
+    try:
+        generator = GENERATORS[algorithm]
+    except KeyError:
+        raise ValueError(f"unknown generator {algorithm!r}; expected one of {sorted(GENERATORS)}") from None
+    generator(grid, rng)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+# Per-cell bits. Every interior wall is shared by two cells, so each one is
+# stored once: a cell owns its right and bottom walls, and the left/top
+# walls of a cell are the right/bottom walls of its neighbours. The outer
+# left and top borders have no owning cell and are kept in two small
+# per-row/per-column arrays instead.
+WALL_RIGHT = 1
+WALL_BOTTOM = 2
+VISITED = 4
+
+SIDES = ("left", "right", "top", "bottom")
+
+# translate() tables used to flip flags across the whole grid at once
+_CLEAR_VISITED = bytes(b & ~VISITED for b in range(256))
+# translate() tables turning cell bytes into 0/1 wall flags, e.g. for
+# drawing a row of cells as wall runs (see flag_runs)
+RIGHT_FLAGS = bytes(1 if b & WALL_RIGHT else 0 for b in range(256))
+BOTTOM_FLAGS = bytes(1 if b & WALL_BOTTOM else 0 for b in range(256))
+
+
+def flag_runs(flags):
+    # (start, end) half-open runs of 1s in a flags byte string
+    start = flags.find(1)
+    while start >= 0:
+        end = flags.find(0, start)
+        if end < 0:
+            end = len(flags)
+        yield start, end
+        start = flags.find(1, end)
+
+
+class Grid:
+    """Wall and visited state for a rectangular maze, one byte per cell.
+
+    Cells are stored row-major, so cell ``(col, row)`` lives at index
+    ``row * num_cols + col``.
+    """
+
+    __slots__ = ("num_cols", "num_rows", "cells", "left", "top", "version")
+
+    def __init__(self, num_cols, num_rows, cells=None, left=None, top=None):
+        # `cells` may be any writable byte buffer, e.g. a memoryview over an
+        # mmap (see storage.load); by default every wall is standing
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        if cells is None:
+            cells = bytearray([WALL_RIGHT | WALL_BOTTOM]) * (num_cols * num_rows)
+        elif len(cells) != num_cols * num_rows:
+            raise ValueError(f"expected {num_cols * num_rows} cells, got {len(cells)}")
+        self.cells = cells
+        # left border of column 0 (one entry per row), top border of row 0
+        # (one entry per column); 1 means the wall is present
+        self.left = bytearray(b"\x01") * num_rows if left is None else bytearray(left)
+        self.top = bytearray(b"\x01") * num_cols if top is None else bytearray(top)
+        # bumped on every wall change so derived data (e.g. a TreeIndex) can
+        # tell it is stale; code that writes wall bits into `cells` directly
+        # must bump it too
+        self.version = 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def index(self, col, row):
+        return row * self.num_cols + col
+
+    def position(self, index):
+        row, col = divmod(index, self.num_cols)
+        return col, row
+
+    def has_wall(self, col, row, side):
+        cells = self.cells
+        i = row * self.num_cols + col
+        if side == "right":
+            return bool(cells[i] & WALL_RIGHT)
+        if side == "bottom":
+            return bool(cells[i] & WALL_BOTTOM)
+        if side == "left":
+            return bool(cells[i - 1] & WALL_RIGHT) if col > 0 else bool(self.left[row])
+        if side == "top":
+            return bool(cells[i - self.num_cols] & WALL_BOTTOM) if row > 0 else bool(self.top[col])
+        raise ValueError(f"unknown side {side!r}; expected one of {SIDES}")
+
+    def set_wall(self, col, row, side, present):
+        i = row * self.num_cols + col
+        if side == "right":
+            bit = WALL_RIGHT
+        elif side == "bottom":
+            bit = WALL_BOTTOM
+        elif side == "left":
+            if col == 0:
+                self.left[row] = 1 if present else 0
+                self.version += 1
+                return
+            i -= 1
+            bit = WALL_RIGHT
+        elif side == "top":
+            if row == 0:
+                self.top[col] = 1 if present else 0
+                self.version += 1
+                return
+            i -= self.num_cols
+            bit = WALL_BOTTOM
+        else:
+            raise ValueError(f"unknown side {side!r}; expected one of {SIDES}")
+        self.version += 1
+        if present:
+            self.cells[i] |= bit
+        else:
+            self.cells[i] &= ~bit
+
+    def is_visited(self, col, row):
+        return bool(self.cells[row * self.num_cols + col] & VISITED)
+
+    def set_visited(self, col, row, visited):
+        i = row * self.num_cols + col
+        if visited:
+            self.cells[i] |= VISITED
+        else:
+            self.cells[i] &= ~VISITED
+
+    def reset_visited(self):
+        self.cells[:] = self.wall_bytes()
+
+    def wall_bytes(self):
+        # the cell bytes with the visited flags cleared
+        cells = self.cells
+        if not isinstance(cells, (bytes, bytearray)):
+            cells = bytes(cells)
+        return cells.translate(_CLEAR_VISITED)
+
+    def neighbors(self, index):
+        # indices of the cells reachable from ``index`` through an open wall
+        cells = self.cells
+        cols = self.num_cols
+        col = index % cols
+        result = []
+        if col < cols - 1 and not cells[index] & WALL_RIGHT:
+            result.append(index + 1)
+        if index + cols < len(cells) and not cells[index] & WALL_BOTTOM:
+            result.append(index + cols)
+        if col > 0 and not cells[index - 1] & WALL_RIGHT:
+            result.append(index - 1)
+        if index >= cols and not cells[index - cols] & WALL_BOTTOM:
+            result.append(index - cols)
+        return result
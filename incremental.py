@@ -0,0 +1,151 @@
+from __future__ import annotations
+from grid import Grid
+from solvers import SolveResult
+import heapq
+import time
+
+# Lifelong Planning A* (Koenig & Likhachev): keeps the shortest-path search
+# from one fixed start to one fixed goal alive between wall edits. Every
+# cell has g (the distance the search settled on) and rhs (a one-step
+# lookahead: 1 + the best g among its open neighbours). A wall edit only
+# changes rhs for the two cells it separates; solve() then re-expands just
+# the cells whose values became inconsistent and could matter for the goal,
+# instead of searching the whole grid again.
+#
+# Tell the engine about each edit with wall_changed(), or edit through
+# Maze.set_wall(), which does it for you. If the grid changed behind the
+# engine's back (Grid.version moved on without a wall_changed call) the next
+# solve() starts over from scratch.
+INF = float("inf")
+
+
+class LPAStar:
+    def __init__(self, grid: Grid, start=(0, 0), goal=None):
+        if goal is None:
+            goal = (grid.num_cols - 1, grid.num_rows - 1)
+        self.grid = grid
+        self.start = grid.index(*start)
+        self.goal = grid.index(*goal)
+        self.reset()
+
+    def reset(self):
+        # forget everything; the next solve() is a full A* search
+        n = len(self.grid)
+        self.version = self.grid.version
+        self._g = [INF] * n
+        self._rhs = [INF] * n
+        self._rhs[self.start] = 0
+        self._open = [self._key(self.start) + (self.start,)]
+        # last path as {cell index: position on the path} and as (col, row)
+        # cells; kept while no edit or re-expansion touches any cell on it
+        self._path_cells = None
+        self._path_positions = []
+
+    def _key(self, i):
+        # (f, g) with the Manhattan distance to the goal as heuristic
+        best = min(self._g[i], self._rhs[i])
+        row, col = divmod(i, self.grid.num_cols)
+        goal_row, goal_col = divmod(self.goal, self.grid.num_cols)
+        return best + abs(goal_col - col) + abs(goal_row - row), best
+
+    def _update(self, i):
+        g = self._g
+        rhs = self._rhs
+        if i != self.start:
+            rhs[i] = min([g[j] for j in self.grid.neighbors(i)], default=INF) + 1
+        # the open list is lazy: entries are skipped or re-keyed on the way
+        # out, so nothing is removed here
+        if g[i] != rhs[i]:
+            heapq.heappush(self._open, self._key(i) + (i,))
+
+    def wall_changed(self, col, row, side):
+        # call after opening or closing the given wall of (col, row)
+        grid = self.grid
+        i = grid.index(col, row)
+        if side == "right":
+            j = i + 1 if col < grid.num_cols - 1 else -1
+        elif side == "left":
+            j = i - 1 if col > 0 else -1
+        elif side == "bottom":
+            j = i + grid.num_cols if row < grid.num_rows - 1 else -1
+        elif side == "top":
+            j = i - grid.num_cols if row > 0 else -1
+        else:
+            raise ValueError(f"unknown side {side!r}")
+        if self.version != grid.version - 1:
+            # some other edit was not reported; start over instead
+            self.reset()
+            return
+        self.version = grid.version
+        # border walls never change a path between two cells
+        if j >= 0:
+            on_path = self._path_cells
+            if on_path is not None and i in on_path and j in on_path and abs(on_path[i] - on_path[j]) == 1:
+                self._path_cells = None
+            self._update(i)
+            self._update(j)
+
+    def _compute(self):
+        g = self._g
+        rhs = self._rhs
+        open_list = self._open
+        neighbors = self.grid.neighbors
+        goal = self.goal
+        on_path = self._path_cells or {}
+        expanded = 0
+        while open_list:
+            k1, k2, i = open_list[0]
+            if g[i] == rhs[i]:
+                # already consistent: a stale entry
+                heapq.heappop(open_list)
+                continue
+            key = self._key(i)
+            if (k1, k2) != key:
+                heapq.heapreplace(open_list, key + (i,))
+                continue
+            if key >= self._key(goal) and rhs[goal] == g[goal]:
+                break
+            heapq.heappop(open_list)
+            expanded += 1
+            if i in on_path:
+                self._path_cells = None
+            if g[i] > rhs[i]:
+                g[i] = rhs[i]
+            else:
+                g[i] = INF
+                self._update(i)
+            for j in neighbors(i):
+                self._update(j)
+        return expanded
+
+    def _path(self):
+        # walk back from the goal along cells whose g drops by one per step
+        g = self._g
+        i = self.goal
+        if g[i] == INF:
+            return []
+        path = [i]
+        neighbors = self.grid.neighbors
+        while i != self.start:
+            i = next(j for j in neighbors(i) if g[j] == g[i] - 1)
+            path.append(i)
+        path.reverse()
+        return path
+
+    def solve(self):
+        # SolveResult for the current walls; `expanded` counts only the cells
+        # re-expanded since the previous solve
+        started = time.perf_counter()
+        if self.version != self.grid.version:
+            self.reset()
+        expanded = self._compute()
+        if self._path_cells is None:
+            # the old path is only reused when no cell on it changed, so
+            # it is still connected and still as short as the goal's g
+            path = self._path()
+            # with no path there is nothing to keep: walking back from an
+            # unreachable goal is free
+            self._path_cells = {i: k for k, i in enumerate(path)} or None
+            self._path_positions = [self.grid.position(i) for i in path]
+        elapsed = time.perf_counter() - started
+        return SolveResult("lpastar", list(self._path_positions), expanded, elapsed)
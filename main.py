@@ -1,12 +1,18 @@
 from __future__ import annotations
 from maze import Maze
+from replay import Replay, record
 from window import Window
 
 
 def main():
     win = Window(800, 600)
-    maze = Maze(10, 10, 10, 20, 40, 40, win)
-    maze.solve()
+    # carve and solve headless, then animate the recorded events
+    maze = Maze(10, 10, 10, 20, 40, 40, carve=False)
+    win.resize(*maze.canvas_size())
+    replay = Replay(record(maze), win, maze.x1, maze.y1, maze.cell_size_x, maze.cell_size_y)
+    # space pauses/resumes, n single-steps, +/- change the speed
+    scheduler = replay.play(interval_ms=50)
+    scheduler.bind_keys()
     win.wait_for_close()
         
 
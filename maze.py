@@ -1,9 +1,25 @@
 from __future__ import annotations
-from window import Window
-from cell import Cell
+from typing import TYPE_CHECKING
+from cell import CellGrid
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM, VISITED
+from events import CARVE, MOVE, UNDO, DONE, RIGHT, DOWN, LEFT, UP
+from generators import GENERATORS, dfs_steps
+from tiled import DEFAULT_TILE_SIZE, tiled_grid
+from solvers import SolveResult, solve as run_solver
+from treeindex import TreeIndex
+from distances import DistanceCache
+from incremental import LPAStar
+from metrics import Metrics
+import storage
+from window import Renderer
+from collections import deque
+from contextlib import nullcontext
 import random
 import time
 
+if TYPE_CHECKING:
+    from window import Window
+
 class Maze:
     def __init__(
             self,
@@ -14,167 +30,353 @@ class Maze:
             cell_size_x,
             cell_size_y,
             win: Window=None,
-            seed=None
+            seed=None,
+            renderer: Renderer=None,
+            algorithm="dfs",
+            carve=True,
+            grid: Grid=None,
+            metrics: Metrics=None
             ):
         # Validate dimensions early to provide a clear error for callers
         if not isinstance(num_rows, int) or not isinstance(num_cols, int):
             raise TypeError("num_rows and num_cols must be integers")
         if num_rows <= 0 or num_cols <= 0:
             raise ValueError("num_rows and num_cols must be positive integers")
+        if algorithm not in GENERATORS:
+            raise ValueError(f"unknown generator {algorithm!r}; expected one of {sorted(GENERATORS)}")
         self.x1 = x1
         self.y1 = y1
         self.num_rows = num_rows
         self.num_cols = num_cols
         self.cell_size_x = cell_size_x
         self.cell_size_y = cell_size_y
-        self.seed = random.seed(seed)
+        # Each maze draws from its own generator, so mazes built concurrently
+        # (or alongside other users of the global `random` module) do not
+        # disturb each other. Without a seed one is picked and kept, so every
+        # maze can be rebuilt exactly from `self.seed`.
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**32)
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self.algorithm = algorithm
+        # Without a window or renderer the maze runs headless: nothing is drawn
+        # and no frame delays are paid. A bare window gets a default renderer.
+        if renderer is None and win is not None:
+            renderer = Renderer(win)
+        if renderer is not None and win is None:
+            win = renderer.win
         self.win = win
-        PADDING = 10
-        needed_w = self.num_cols * self.cell_size_x + self.x1 + PADDING
-        needed_h = self.num_rows * self.cell_size_y + self.y1 + PADDING
+        self._renderer = renderer
+        # opt-in instrumentation, see metrics.py
+        self._metrics = metrics
+        if metrics is not None and win is not None:
+            metrics.instrument_window(win)
         if self.win:
-            self.win.resize(needed_w, needed_h)
-        self.__cells = []
+            self.win.resize(*self.canvas_size())
+        # an existing grid (e.g. from Maze.load) is used as-is, uncarved
+        if grid is not None and (grid.num_cols, grid.num_rows) != (num_cols, num_rows):
+            raise ValueError("grid dimensions do not match num_rows/num_cols")
+        self._grid = Grid(self.num_cols, self.num_rows) if grid is None else grid
+        self.__cells = CellGrid(self._grid, self.win)
+        self._tree_index = None
+        self._incremental = None
+        self._distances = None
 
-        self.__create_cells()
-        self.__break_entrance_and_exit()
-        self.__break_walls_r(0, 0)
-        self.__reset_cells_visited()
+        # carve=False leaves every wall standing so carve_steps() can be
+        # driven from outside, e.g. by a scheduler.Scheduler
+        self.__carved = grid is not None
+        if self.__carved or not carve:
+            self.__create_cells(animate=False)
+        elif self._renderer is None:
+            deque(self.carve_steps(), maxlen=0)
+        else:
+            if algorithm == "dfs":
+                self.__create_cells()
+            self.__run(self.carve_steps())
+
+    @property
+    def grid(self):
+        return self._grid
+
+    def save(self, path):
+        # versioned binary file, see storage.py
+        storage.save(
+            path, self._grid, self.seed, self.algorithm,
+            self.x1, self.y1, self.cell_size_x, self.cell_size_y,
+        )
+
+    @classmethod
+    def load(cls, path, win: Window=None, renderer: Renderer=None, use_mmap=True):
+        # the grid reads straight from a copy-on-write mapping of the file
+        stored = storage.load(path, use_mmap)
+        grid = stored.grid
+        return cls(
+            stored.x1, stored.y1, grid.num_rows, grid.num_cols,
+            stored.cell_size_x, stored.cell_size_y, win=win, seed=stored.seed,
+            renderer=renderer, algorithm=stored.algorithm or "dfs", grid=grid,
+        )
+
+    @classmethod
+    def tiled(
+            cls,
+            x1,
+            y1,
+            num_rows,
+            num_cols,
+            cell_size_x,
+            cell_size_y,
+            win: Window=None,
+            seed=None,
+            renderer: Renderer=None,
+            algorithm="kruskal",
+            tile_size=DEFAULT_TILE_SIZE,
+            workers=None
+            ):
+        # Carve a very large maze in parallel tiles (see tiled.py). The
+        # finished maze is drawn once rather than animated.
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**32)
+        grid = tiled_grid(num_cols, num_rows, seed, algorithm, tile_size, workers)
+        grid.set_wall(0, 0, "top", False)
+        grid.set_wall(num_cols - 1, num_rows - 1, "bottom", False)
+        return cls(
+            x1, y1, num_rows, num_cols, cell_size_x, cell_size_y, win=win, seed=seed,
+            renderer=renderer, algorithm=algorithm, grid=grid,
+        )
+
+    def to_text(self):
+        return storage.to_text(self._grid)
+
+    @classmethod
+    def from_text(cls, text, x1=0, y1=0, cell_size_x=10, cell_size_y=10, win: Window=None, renderer: Renderer=None):
+        grid = storage.from_text(text)
+        return cls(x1, y1, grid.num_rows, grid.num_cols, cell_size_x, cell_size_y, win=win, renderer=renderer, grid=grid)
     
-    def __create_cells(self):
-        for col in range(self.num_cols):
-            self.__cells.append([])
-            for row in range(self.num_rows):
-                cell = Cell(self.win)
-                self.__cells[col].append(cell)
-                self.__draw_cell(col, row)
+    def __create_cells(self, animate=True):
+        # wall state lives in self._grid; this only draws the cells
+        if self._renderer is None:
+            return
+        with self.__phase("create_cells"):
+            for col in range(self.num_cols):
+                for row in range(self.num_rows):
+                    self.__draw_cell(col, row)
+                    if animate:
+                        self.__animate()
 
-    def __draw_cell(self, col, row):
+    def __phase(self, name):
+        return nullcontext() if self._metrics is None else self._metrics.phase(name)
+
+    def __observe(self, name, steps):
+        return steps if self._metrics is None else self._metrics.observe(name, steps)
+
+    def canvas_size(self):
+        # the drawing area needed for the whole maze plus padding
+        PADDING = 10
+        needed_w = self.num_cols * self.cell_size_x + self.x1 + PADDING
+        needed_h = self.num_rows * self.cell_size_y + self.y1 + PADDING
+        return needed_w, needed_h
+
+    def cell_bounds(self, col, row):
+        # (x1, x2, y1, y2) of a cell in drawing coordinates
         x1 = self.x1 + col * self.cell_size_x
         y1 = self.y1 + row * self.cell_size_y
         x2 = x1 + self.cell_size_x
         y2 = y1 + self.cell_size_y
-        self.__cells[col][row].draw(x1, x2, y1, y2)
-        self.__animate()
+        return x1, x2, y1, y2
+
+    def __draw_cell(self, col, row):
+        if self._renderer is None:
+            return
+        self.__cells[col][row].draw(*self.cell_bounds(col, row))
 
     def __break_entrance_and_exit(self):
         # break entrance (top-left)
-        self.__cells[0][0].has_top_wall = False
+        self._grid.set_wall(0, 0, "top", False)
         self.__draw_cell(0, 0)
         # break exit (bottom-right)
-        self.__cells[self.num_cols - 1][self.num_rows - 1].has_bottom_wall = False
+        self._grid.set_wall(self.num_cols - 1, self.num_rows - 1, "bottom", False)
         self.__draw_cell(self.num_cols - 1, self.num_rows - 1)
     
     def __animate(self):
-        if self.win:
-            self.win.redraw()
-        time.sleep(0.05)
+        if self._renderer is not None:
+            self._renderer.frame()
 
-    def __break_walls_r(self, col, row):
-        self.__cells[col][row].visited = True
+    def __run(self, steps):
+        # Drive a step generator synchronously, paying one renderer frame
+        # for every step that drew something. Returns the generator's result.
         while True:
-            next_index_list = []
-
-            # determine which cell(s) to visit next
-            # left
-            if col > 0 and not self.__cells[col - 1][row].visited:
-                next_index_list.append((col - 1, row))
-            # right
-            if col < self.num_cols - 1 and not self.__cells[col + 1][row].visited:
-                next_index_list.append((col + 1, row))
-            # up
-            if row > 0 and not self.__cells[col][row - 1].visited:
-                next_index_list.append((col, row - 1))
-            # down
-            if row < self.num_rows - 1 and not self.__cells[col][row + 1].visited:
-                next_index_list.append((col, row + 1))
-
-            # if there is nowhere to go from here
-            # just break out
-            if len(next_index_list) == 0:
-                self.__draw_cell(col, row)
-                return
-
-            # randomly choose the next direction to go
-            direction_index = random.randrange(len(next_index_list))
-            next_index = next_index_list[direction_index]
-
-            # knock out walls between this cell and the next cell(s)
-            # right
-            if next_index[0] == col + 1:
-                self.__cells[col][row].has_right_wall = False
-                self.__cells[col + 1][row].has_left_wall = False
-            # left
-            if next_index[0] == col - 1:
-                self.__cells[col][row].has_left_wall = False
-                self.__cells[col - 1][row].has_right_wall = False
-            # down
-            if next_index[1] == row + 1:
-                self.__cells[col][row].has_bottom_wall = False
-                self.__cells[col][row + 1].has_top_wall = False
-            # up
-            if next_index[1] == row - 1:
-                self.__cells[col][row].has_top_wall = False
-                self.__cells[col][row - 1].has_bottom_wall = False
-
-            # recursively visit the next cell
-            self.__break_walls_r(next_index[0], next_index[1])
-    
+            try:
+                op = next(steps)[0]
+            except StopIteration as finished:
+                return finished.value
+            if op != CARVE:
+                self.__animate()
+
+    def carve_steps(self):
+        # Resumable carve. The DFS generator yields one events tuple per
+        # step and draws finished cells as it goes; other generators carve in
+        # one go and draw the result. Frame pacing is left to the caller.
+        # Wrapped by the maze's Metrics when it has one.
+        return self.__observe("carve", self.__carve_steps())
+
+    def __carve_steps(self):
+        if self.__carved:
+            raise RuntimeError("maze has already been carved")
+        self.__carved = True
+        self.__break_entrance_and_exit()
+        if self.algorithm != "dfs":
+            GENERATORS[self.algorithm](self._grid, self._rng)
+            self.__create_cells(animate=False)
+        elif self._renderer is None:
+            yield from dfs_steps(self._grid, self._rng)
+        else:
+            for event in dfs_steps(self._grid, self._rng):
+                if event[0] == DONE:
+                    self.__draw_cell(event[1], event[2])
+                yield event
+        # the generators write wall bits straight into the cell array
+        self._grid.version += 1
+        self.__reset_cells_visited()
+
     def __reset_cells_visited(self):
-        
-        for col in range(self.num_cols):
-            for row in range(self.num_rows):
-                self.__cells[col][row].visited = False
+        with self.__phase("reset_visited"):
+            self._grid.reset_visited()
 
-    def solve(self):
-        return self._solve_r(0,0)
-    
-    def _solve_r(self, col, row):
-        if self.__cells[col][row].visited:
-            return False
-        self.__cells[col][row].visited = True
-        # visiting a cell; drawing/animation is handled by Cell.draw_move
-
-        # if we've reached the exit cell
-        if col == self.num_cols - 1 and row == self.num_rows - 1:
-            return True
-        
-        # try moving in each possible direction; draw the forward move before recursing
-        # right
-        if not self.__cells[col][row].has_right_wall and not self.__cells[col + 1][row].visited:
-            # draw forward
-            self.__cells[col][row].draw_move(self.__cells[col + 1][row], undo=False)
-            if self._solve_r(col + 1, row):
-                return True
-            # backtrack visually
-            self.__cells[col][row].draw_move(self.__cells[col + 1][row], undo=True)
-        # down
-        if not self.__cells[col][row].has_bottom_wall and not self.__cells[col][row + 1].visited:
-            self.__cells[col][row].draw_move(self.__cells[col][row + 1], undo=False)
-            if self._solve_r(col, row + 1):
-                return True
-            self.__cells[col][row].draw_move(self.__cells[col][row + 1], undo=True)
-        # left
-        if not self.__cells[col][row].has_left_wall and not self.__cells[col - 1][row].visited:
-            self.__cells[col][row].draw_move(self.__cells[col - 1][row], undo=False)
-            if self._solve_r(col - 1, row):
-                return True
-            self.__cells[col][row].draw_move(self.__cells[col - 1][row], undo=True)
-        # up
-        if not self.__cells[col][row].has_top_wall and not self.__cells[col][row - 1].visited:
-            self.__cells[col][row].draw_move(self.__cells[col][row - 1], undo=False)
-            if self._solve_r(col, row - 1):
-                return True
-            self.__cells[col][row].draw_move(self.__cells[col][row - 1], undo=True)
-        
-        # backtrack - no valid moves from here
-        # draw the backtrack move (undo) in red
-        if col > 0 and not self.__cells[col][row].has_left_wall and self.__cells[col - 1][row].visited:
-            self.__cells[col][row].draw_move(self.__cells[col - 1][row], undo=True)
-        elif col < self.num_cols - 1 and not self.__cells[col][row].has_right_wall and self.__cells[col + 1][row].visited:
-            self.__cells[col][row].draw_move(self.__cells[col + 1][row], undo=True)
-        elif row > 0 and not self.__cells[col][row].has_top_wall and self.__cells[col][row - 1].visited:
-            self.__cells[col][row].draw_move(self.__cells[col][row - 1], undo=True)
-        elif row < self.num_rows - 1 and not self.__cells[col][row].has_bottom_wall and self.__cells[col][row +1].visited:
-            self.__cells[col][row].draw_move(self.__cells[col][row + 1], undo=True)
-        return False
\ No newline at end of file
+    def solve(self, algorithm="dfs"):
+        # With a renderer attached the default DFS is animated on the Cell
+        # views; every other case runs a solver from solvers.SOLVERS on the
+        # grid data only. Either way a SolveResult is returned, which is
+        # truthy when the exit was reached.
+        if algorithm == "dfs" and self._renderer is not None:
+            # the step solver marks cells VISITED; clear any earlier run's
+            # marks so solve() can be repeated like the headless solvers
+            self.__reset_cells_visited()
+            started = time.perf_counter()
+            path, expanded = self.__run(self.solve_steps())
+            elapsed = time.perf_counter() - started
+            if self._metrics is not None:
+                self._metrics.count("solve.expanded", expanded)
+            return SolveResult(algorithm, [self._grid.position(i) for i in path], expanded, elapsed)
+        # headless DFS reports its backtracks and stack depth through stats
+        stats = {} if algorithm == "dfs" and self._metrics is not None else None
+        with self.__phase("solve"):
+            result = run_solver(self._grid, algorithm, stats=stats)
+        if self._metrics is not None:
+            self._metrics.count("solve.expanded", result.expanded)
+        if stats:
+            self._metrics.count("solve.backtracks", stats["backtracks"])
+            self._metrics.peak("solve.stack", stats["stack"])
+        return result
+
+    def set_wall(self, col, row, side, present):
+        # Open (present=False) or close one wall of a cell after carving,
+        # e.g. for live level editing. The change is drawn, a cached tree
+        # index goes stale and the incremental solver repairs its search.
+        if not (0 <= col < self.num_cols and 0 <= row < self.num_rows):
+            raise IndexError(f"cell ({col}, {row}) is outside the maze")
+        self._grid.set_wall(col, row, side, present)
+        self.__draw_cell(col, row)
+        if self._incremental is not None:
+            self._incremental.wall_changed(col, row, side)
+
+    def incremental_solver(self):
+        # LPAStar from the entrance to the exit, kept across set_wall() edits
+        # so each re-solve only repairs the part of the search that changed
+        if self._incremental is None:
+            self._incremental = LPAStar(self._grid)
+        return self._incremental
+
+    def tree_index(self):
+        # TreeIndex for O(log n) distance and path queries between any two
+        # cells; built on first use and rebuilt after walls change
+        index = self._tree_index
+        if index is None or index.stale:
+            index = self._tree_index = TreeIndex(self._grid)
+        return index
+
+    def distances(self):
+        # DistanceCache of BFS distance fields: distances from any set of
+        # cells to every cell, and batched (start, goal) queries
+        if self._distances is None:
+            self._distances = DistanceCache(self._grid)
+        return self._distances
+
+    def solve_steps(self, col=0, row=0):
+        # see __solve_steps; wrapped by the maze's Metrics when it has one
+        return self.__observe("solve", self.__solve_steps(col, row))
+
+    def __solve_steps(self, col=0, row=0):
+        # Resumable depth-first search over the packed grid, yielding an
+        # events.MOVE or events.UNDO tuple for every move it draws. Each
+        # stack frame is [index, next direction to try]; directions are tried
+        # in the same order as the old recursive solver (right, down, left,
+        # up) and moves are drawn in the same sequence, including the red
+        # backtrack lines. Returns (path of indices, cells expanded); the
+        # path is empty when the exit can't be reached.
+        cells = self._grid.cells
+        exit_index = len(cells) - 1
+        i = row * self.num_cols + col
+        if cells[i] & VISITED:
+            return [], 0
+        cells[i] |= VISITED
+        expanded = 1
+        if i == exit_index:
+            return [i], expanded
+
+        stack = [[i, RIGHT]]
+        while stack:
+            frame = stack[-1]
+            i, direction = frame
+            row, col = divmod(i, self.num_cols)
+            if direction <= UP:
+                frame[1] += 1
+                next_index = self.__neighbor(i, direction)
+                if next_index < 0 or cells[next_index] & VISITED:
+                    continue
+                # draw forward, then descend
+                self.__draw_move(i, next_index, undo=False)
+                yield (MOVE, col, row, direction)
+                cells[next_index] |= VISITED
+                expanded += 1
+                # if we've reached the exit cell
+                if next_index == exit_index:
+                    return [frame[0] for frame in stack] + [next_index], expanded
+                stack.append([next_index, RIGHT])
+                continue
+
+            # backtrack - no valid moves from here
+            # draw the backtrack move (undo) in red
+            for direction in (LEFT, RIGHT, UP, DOWN):
+                next_index = self.__neighbor(i, direction)
+                if next_index >= 0 and cells[next_index] & VISITED:
+                    self.__draw_move(i, next_index, undo=True)
+                    yield (UNDO, col, row, direction)
+                    break
+            stack.pop()
+            # backtrack visually from the parent frame
+            if stack:
+                parent, tried = stack[-1]
+                self.__draw_move(parent, i, undo=True)
+                parent_row, parent_col = divmod(parent, self.num_cols)
+                yield (UNDO, parent_col, parent_row, tried - 1)
+        return [], expanded
+
+    def __neighbor(self, i, direction):
+        # index of the cell through the open wall in `direction`, or -1
+        cells = self._grid.cells
+        num_cols = self.num_cols
+        row, col = divmod(i, num_cols)
+        if direction == RIGHT:
+            return i + 1 if col < num_cols - 1 and not cells[i] & WALL_RIGHT else -1
+        if direction == DOWN:
+            return i + num_cols if row < self.num_rows - 1 and not cells[i] & WALL_BOTTOM else -1
+        if direction == LEFT:
+            return i - 1 if col > 0 and not cells[i - 1] & WALL_RIGHT else -1
+        return i - num_cols if row > 0 and not cells[i - num_cols] & WALL_BOTTOM else -1
+
+    def __draw_move(self, from_index, to_index, undo):
+        if self._renderer is None:
+            return
+        from_col, from_row = self._grid.position(from_index)
+        to_col, to_row = self._grid.position(to_index)
+        self.__cells[from_col][from_row].draw_move(self.__cells[to_col][to_row], undo=undo)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from generators import GENERATORS
+from maze import Maze
+from solvers import SOLVERS
+import argparse
+import json
+import os
+import sys
+import time
+
+# Batch entry point:
+#   python -m mazesolver generate --rows 50 --cols 50 --seeds 0..999 --out mazes/
+#   python -m mazesolver solve --seeds 0..999 --input mazes/ --solver bfs
+#   python -m mazesolver bench --rows 200 --cols 200 --seeds 0..99 --workers 8
+# Work is split into chunks of seeds and fanned out over a process pool.
+# Results are written as JSON lines as soon as they can be emitted in seed
+# order, so output is identical whatever the worker count.
+
+
+def parse_seeds(text):
+    # "0..99" (inclusive), "1,5,9" or a mix such as "0..9,20"
+    seeds = []
+    for part in text.split(","):
+        part = part.strip()
+        if ".." in part:
+            first, last = part.split("..", 1)
+            first, last = int(first), int(last)
+            if last < first:
+                raise argparse.ArgumentTypeError(f"empty seed range {part!r}")
+            seeds.extend(range(first, last + 1))
+        elif part:
+            seeds.append(int(part))
+    if not seeds:
+        raise argparse.ArgumentTypeError("no seeds given")
+    return seeds
+
+
+def _maze_path(directory, seed):
+    return os.path.join(directory, f"maze-{seed}.maze")
+
+
+def _build(options, seed):
+    if options.get("input"):
+        return Maze.load(_maze_path(options["input"], seed))
+    return Maze(0, 0, options["rows"], options["cols"], 10, 10, seed=seed, algorithm=options["algorithm"])
+
+
+def _run_seed(command, options, seed):
+    result = {"seed": seed}
+    started = time.perf_counter()
+    maze = _build(options, seed)
+    # saved mazes are loaded, not generated
+    result["load_s" if options.get("input") else "generate_s"] = time.perf_counter() - started
+    if command == "generate" and options.get("out"):
+        path = _maze_path(options["out"], seed)
+        maze.save(path)
+        result["path"] = path
+    if command in ("solve", "bench"):
+        solved = maze.solve(algorithm=options["solver"])
+        result["solved"] = solved.found
+        result["length"] = len(solved.path)
+        result["expanded"] = solved.expanded
+        result["solve_s"] = solved.elapsed
+    result["cells"] = maze.num_rows * maze.num_cols
+    return result
+
+
+def _run_chunk(command, options, seeds):
+    # worker entry point: one task per chunk keeps the IPC cost per maze low
+    return [_run_seed(command, options, seed) for seed in seeds]
+
+
+def _chunks(seeds, size):
+    return [seeds[i:i + size] for i in range(0, len(seeds), size)]
+
+
+def run(command, options, seeds, workers=1, chunk_size=None):
+    # Yields one result dict per seed, in seed-list order. With more than one
+    # worker, chunks complete out of order and are held back until every
+    # earlier chunk has been yielded.
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if chunk_size is None:
+        chunk_size = max(1, min(64, len(seeds) // (workers * 8)))
+    elif chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    chunks = _chunks(seeds, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _run_chunk(command, options, chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_run_chunk, command, options, chunk): index for index, chunk in enumerate(chunks)}
+        finished = {}
+        next_index = 0
+        for future in as_completed(futures):
+            finished[futures[future]] = future.result()
+            while next_index in finished:
+                yield from finished.pop(next_index)
+                next_index += 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m mazesolver", description="Batch maze generation and solving.")
+    parser.add_argument("command", choices=("generate", "solve", "bench"))
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--seeds", type=parse_seeds, default=[0], help='e.g. "0..999" (inclusive) or "1,5,9"')
+    parser.add_argument("--algorithm", choices=sorted(GENERATORS), default="dfs", help="generator")
+    parser.add_argument("--solver", choices=sorted(SOLVERS), default="bfs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=None, help="seeds per worker task")
+    parser.add_argument("--out", help="directory for generated .maze files")
+    parser.add_argument("--input", help="solve mazes saved by 'generate --out' instead of regenerating")
+    return parser
+
+
+def main(argv=None, stdout=None, stderr=None):
+    args = build_parser().parse_args(argv)
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+    if args.rows <= 0 or args.cols <= 0:
+        raise SystemExit("--rows and --cols must be positive")
+    if args.workers <= 0:
+        raise SystemExit("--workers must be positive")
+    if args.chunk_size is not None and args.chunk_size <= 0:
+        raise SystemExit("--chunk-size must be positive")
+    if args.input:
+        missing = [seed for seed in args.seeds if not os.path.isfile(_maze_path(args.input, seed))]
+        if missing:
+            raise SystemExit(f"no saved maze for seed {missing[0]} in {args.input} ({len(missing)} missing)")
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    options = {
+        "rows": args.rows,
+        "cols": args.cols,
+        "algorithm": args.algorithm,
+        "solver": args.solver,
+        "out": args.out,
+        "input": args.input,
+    }
+    started = time.perf_counter()
+    count = 0
+    cells = 0
+    for result in run(args.command, options, args.seeds, args.workers, args.chunk_size):
+        if args.command != "bench":
+            stdout.write(json.dumps(result) + "\n")
+        count += 1
+        cells += result["cells"]
+    elapsed = time.perf_counter() - started
+    summary = {
+        "command": args.command,
+        "mazes": count,
+        "workers": args.workers,
+        "seconds": elapsed,
+        "mazes_per_s": count / elapsed if elapsed else 0.0,
+        "cells_per_s": cells / elapsed if elapsed else 0.0,
+    }
+    if args.command == "bench":
+        stdout.write(json.dumps(summary) + "\n")
+    else:
+        stderr.write(json.dumps(summary) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
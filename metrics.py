@@ -0,0 +1,162 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from events import CARVE, DONE, MOVE, UNDO, DELTAS
+import cProfile
+import json
+import time
+
+# Opt-in instrumentation for a Maze: Maze(..., metrics=Metrics()). A maze
+# built without one never calls into this module, so the only cost when
+# disabled is an `is None` check per phase, never per step.
+#
+# Collected (and summed over every maze sharing the same Metrics):
+#   timings   seconds per phase: "create_cells", "carve", "reset_visited",
+#             "solve". Step-driven phases count only the time spent inside
+#             the step generator, so a scheduler idling between frames does
+#             not inflate them. Phases nest ("carve" includes its
+#             "reset_visited").
+#   counters  "<phase>.cells" cells entered for the step-driven DFS carve
+#             and solve, "<phase>.backtracks" stack pops for those and for
+#             the headless DFS solver, "solve.expanded" for every solver,
+#             and "draw_line" / "redraw" calls on the window
+#   peaks     "<phase>.stack", the deepest the DFS stack got
+#
+# Callbacks added with add_callback(fn) are called as fn(phase, event) for
+# every step event (see events.py). Metrics(profile=True) also runs
+# cProfile during every phase; dump_stats() writes the result for pstats,
+# snakeviz and friends.
+
+
+class Metrics:
+    def __init__(self, profile=False):
+        self.timings = {}
+        self.counters = {}
+        self.peaks = {}
+        self._callbacks = []
+        self._profiler = cProfile.Profile() if profile else None
+        self._profiling = 0
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def peak(self, name, value):
+        if value > self.peaks.get(name, 0):
+            self.peaks[name] = value
+
+    def _record_time(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def _profile(self, on):
+        # phases nest, so only the outermost one switches the profiler
+        if self._profiler is None:
+            return
+        if on:
+            self._profiling += 1
+            if self._profiling == 1:
+                self._profiler.enable()
+        else:
+            self._profiling -= 1
+            if self._profiling == 0:
+                self._profiler.disable()
+
+    @contextmanager
+    def phase(self, name):
+        self._profile(True)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record_time(name, time.perf_counter() - started)
+            self._profile(False)
+
+    def observe(self, name, steps):
+        # Wrap a step generator (Maze.carve_steps / Maze.solve_steps): time
+        # spent inside it, counters, stack depth and callbacks. Returns the
+        # wrapped generator's return value.
+        #
+        # The DFS stack is mirrored from the events. Carving pushes on CARVE
+        # and pops on DONE. The solver pushes on MOVE; when it backs out of a
+        # cell it emits an UNDO from that cell and then one from the parent
+        # towards it, and only the second points at the mirrored top.
+        callbacks = self._callbacks
+        counters = self.counters
+        cells_key = name + ".cells"
+        backtracks_key = name + ".backtracks"
+        counters.setdefault(cells_key, 0)
+        counters.setdefault(backtracks_key, 0)
+        stack = None
+        peak = self.peaks.get(name + ".stack", 0)
+        elapsed = 0.0
+        try:
+            while True:
+                self._profile(True)
+                started = time.perf_counter()
+                try:
+                    event = next(steps)
+                except StopIteration as finished:
+                    return finished.value
+                finally:
+                    elapsed += time.perf_counter() - started
+                    self._profile(False)
+                op, col, row, direction = event
+                if stack is None:
+                    stack = [(col, row)]
+                if op == CARVE or op == MOVE:
+                    counters[cells_key] += 1
+                    dcol, drow = DELTAS[direction]
+                    stack.append((col + dcol, row + drow))
+                    if len(stack) > peak:
+                        peak = len(stack)
+                elif op == DONE:
+                    counters[backtracks_key] += 1
+                    stack.pop()
+                elif op == UNDO:
+                    dcol, drow = DELTAS[direction]
+                    if stack and stack[-1] == (col + dcol, row + drow):
+                        counters[backtracks_key] += 1
+                        stack.pop()
+                for callback in callbacks:
+                    callback(name, event)
+                yield event
+        finally:
+            self._record_time(name, elapsed)
+            self.peaks[name + ".stack"] = peak
+
+    def instrument_window(self, win):
+        # count draw_line/redraw calls by shadowing the bound methods on this
+        # window instance; the class itself is left alone
+        draw_line = win.draw_line
+        redraw = win.redraw
+        counters = self.counters
+        counters.setdefault("draw_line", 0)
+        counters.setdefault("redraw", 0)
+
+        def counted_draw_line(line, fill_color):
+            counters["draw_line"] += 1
+            draw_line(line, fill_color)
+
+        def counted_redraw():
+            counters["redraw"] += 1
+            redraw()
+
+        win.draw_line = counted_draw_line
+        win.redraw = counted_redraw
+
+    def to_dict(self):
+        return {
+            "timings": dict(self.timings),
+            "counters": dict(self.counters),
+            "peaks": dict(self.peaks),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def dump_stats(self, path):
+        # cProfile/pstats file covering every instrumented phase
+        if self._profiler is None:
+            raise RuntimeError("create Metrics(profile=True) to collect profile data")
+        self._profiler.dump_stats(path)
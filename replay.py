@@ -0,0 +1,283 @@
+from __future__ import annotations
+from array import array
+from typing import TYPE_CHECKING
+from cell import CellGrid
+from events import (
+    CARVE, DONE, MOVE, RIGHT, DOWN, LEFT, DELTAS,
+    COL_SHIFT, COORD_MASK, DIRECTION_MASK, DIRECTION_SHIFT, OP_MASK, ROW_SHIFT,
+    pack, pack_many, unpack,
+)
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM
+from scheduler import Scheduler
+from window import Line, Point
+import struct
+import sys
+
+if TYPE_CHECKING:
+    from maze import Maze
+    from window import Window
+
+# Record once, replay anywhere.
+#
+# An EventLog holds the step events of a carve and a solve (see events.py)
+# packed one per 64-bit word. record(maze) fills one by running an uncarved
+# headless maze at full speed; generators other than DFS carve in one go, so
+# their passages are logged afterwards as CARVE events in grid order.
+#
+# Replay plays a log back onto a Window, starting from a grid with every
+# wall standing and the entrance and exit open, as Maze does. The state
+# after any number of events is reachable with seek(); play() hands the
+# remaining events to a scheduler.Scheduler, so the speed is its
+# steps_per_frame / interval_ms and nothing sleeps. Logs are saved as a
+# small little-endian header followed by the records.
+MAGIC = b"MZLG"
+VERSION = 1
+# magic, format version, num_cols, num_rows, event count
+_HEADER = struct.Struct("<4sHIIQ")
+# Grid side names by events direction
+_SIDES = ("right", "bottom", "left", "top")
+
+
+class EventLog:
+    def __init__(self, num_cols, num_rows, records=()):
+        # raises ValueError for a grid too large to pack
+        pack(0, num_cols - 1, num_rows - 1, 0)
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.records = array("Q", records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return unpack(self.records[index])
+
+    def __iter__(self):
+        return map(unpack, self.records)
+
+    def append(self, event):
+        self.records.append(pack(*event))
+
+    def extend(self, events):
+        # events from cells of this log's grid, which __init__ has checked
+        # fit a record, so they are packed without per-event checks
+        self.records.extend(pack_many(events))
+
+    def to_bytes(self):
+        records = self.records
+        if sys.byteorder == "big":
+            records = array("Q", records)
+            records.byteswap()
+        header = _HEADER.pack(MAGIC, VERSION, self.num_cols, self.num_rows, len(records))
+        return header + records.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < _HEADER.size:
+            raise ValueError("too short to be an event log")
+        magic, version, num_cols, num_rows, count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("not an event log")
+        if version != VERSION:
+            raise ValueError(f"unsupported event log version {version}")
+        end = _HEADER.size + 8 * count
+        if len(data) < end:
+            raise ValueError("event log is truncated")
+        log = cls(num_cols, num_rows)
+        log.records.frombytes(data[_HEADER.size:end])
+        if sys.byteorder == "big":
+            log.records.byteswap()
+        return log
+
+    def save(self, path):
+        with open(path, "wb") as out:
+            out.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as source:
+            return cls.from_bytes(source.read())
+
+
+def record(maze: Maze, solve=True):
+    # Carve a maze built with carve=False, then (by default) run the DFS
+    # solver from the entrance, and return the log of both
+    # EventLog checks that every cell of the maze can be packed
+    log = EventLog(maze.num_cols, maze.num_rows)
+    log.extend(maze.carve_steps())
+    if maze.algorithm != "dfs":
+        _log_passages(log, maze.grid)
+    if solve:
+        log.extend(maze.solve_steps())
+        # the step solver marks cells VISITED; leave the maze solvable
+        maze.grid.reset_visited()
+    return log
+
+
+def _log_passages(log: EventLog, grid: Grid):
+    # every open interior wall as a CARVE right or down, then every cell DONE
+    cols = grid.num_cols
+    rows = grid.num_rows
+    append = log.records.append
+    cells = grid.cells
+    for row in range(rows):
+        for col in range(cols):
+            bits = cells[row * cols + col]
+            if col < cols - 1 and not bits & WALL_RIGHT:
+                append(pack(CARVE, col, row, RIGHT))
+            if row < rows - 1 and not bits & WALL_BOTTOM:
+                append(pack(CARVE, col, row, DOWN))
+    for row in range(rows):
+        for col in range(cols):
+            append(pack(DONE, col, row, RIGHT))
+
+
+class Replay:
+    def __init__(self, log: EventLog, win: Window=None, x1=0, y1=0, cell_size_x=10, cell_size_y=10):
+        self.log = log
+        self.win = win
+        self.x1 = x1
+        self.y1 = y1
+        self.cell_size_x = cell_size_x
+        self.cell_size_y = cell_size_y
+        # solver moves drawn so far, so seeking back can erase them
+        self._moves = set()
+        self._reset()
+
+    def __len__(self):
+        return len(self.log)
+
+    @property
+    def grid(self):
+        # the walls as of the current position
+        return self._grid
+
+    @property
+    def done(self):
+        return self.position >= len(self.log)
+
+    def _reset(self):
+        log = self.log
+        grid = self._grid = Grid(log.num_cols, log.num_rows)
+        grid.set_wall(0, 0, "top", False)
+        grid.set_wall(log.num_cols - 1, log.num_rows - 1, "bottom", False)
+        self._cells = CellGrid(grid, self.win)
+        self.position = 0
+        if self.win is None:
+            return
+        for move in self._moves:
+            self.__draw_move(*move, self.win.bg)
+        self._moves.clear()
+        for col in range(log.num_cols):
+            for row in range(log.num_rows):
+                self.__draw_cell(col, row)
+
+    def _apply(self, event):
+        op, col, row, direction = event
+        if op == CARVE:
+            self._grid.set_wall(col, row, _SIDES[direction], False)
+            return
+        if self.win is None:
+            return
+        if op == DONE:
+            self.__draw_cell(col, row)
+            return
+        dcol, drow = DELTAS[direction]
+        move = (col, row, col + dcol, row + drow)
+        self._moves.add(move)
+        self.__draw_move(*move, "gray" if op == MOVE else "red")
+
+    def step(self, count=1):
+        # apply up to `count` more events; returns how many were applied
+        log = self.log
+        end = min(self.position + count, len(log))
+        if self.win is None:
+            self.__carve_headless(log.records[self.position:end])
+        else:
+            for index in range(self.position, end):
+                self._apply(log[index])
+        applied = end - self.position
+        self.position = end
+        return applied
+
+    def seek(self, position):
+        # jump to the state after the first `position` events; going back
+        # replays from the start without drawing frames in between
+        position = max(0, min(position, len(self.log)))
+        if position < self.position:
+            self._reset()
+        self.step(position - self.position)
+        if self.win is not None:
+            self.win.flush()
+
+    def steps(self):
+        # the remaining events, each applied as it is yielded; picks up from
+        # wherever seek() left the position
+        log = self.log
+        while self.position < len(log):
+            event = log[self.position]
+            self.position += 1
+            self._apply(event)
+            yield event
+
+    def play(self, steps_per_frame=1, interval_ms=16, on_done=None):
+        # play the rest of the log from the window's event loop; returns the
+        # started Scheduler for pausing and changing the speed
+        scheduler = Scheduler(self.win, self.steps(), steps_per_frame, interval_ms, on_done)
+        scheduler.start()
+        return scheduler
+
+    def __carve_headless(self, records):
+        # _apply for CARVE events straight from the packed records; nothing
+        # else changes the grid
+        grid = self._grid
+        cells = grid.cells
+        cols = grid.num_cols
+        for record in records:
+            if record & OP_MASK != CARVE:
+                continue
+            i = (record >> ROW_SHIFT) * cols + (record >> COL_SHIFT & COORD_MASK)
+            direction = record >> DIRECTION_SHIFT & DIRECTION_MASK
+            if direction == RIGHT:
+                cells[i] &= ~WALL_RIGHT
+            elif direction == DOWN:
+                cells[i] &= ~WALL_BOTTOM
+            elif direction == LEFT:
+                cells[i - 1] &= ~WALL_RIGHT
+            else:
+                cells[i - cols] &= ~WALL_BOTTOM
+        grid.version += 1
+
+    def __cell_bounds(self, col, row):
+        x1 = self.x1 + col * self.cell_size_x
+        y1 = self.y1 + row * self.cell_size_y
+        return x1, x1 + self.cell_size_x, y1, y1 + self.cell_size_y
+
+    def __draw_cell(self, col, row):
+        self._cells.cell(col, row).draw(*self.__cell_bounds(col, row))
+
+    def __draw_move(self, from_col, from_row, to_col, to_row, fill_color):
+        # the same centre-to-centre line as Cell.draw_move
+        x1, x2, y1, y2 = self.__cell_bounds(from_col, from_row)
+        start = Point(x1 + (x2 - x1) / 2, y1 + (y2 - y1) / 2)
+        x1, x2, y1, y2 = self.__cell_bounds(to_col, to_row)
+        end = Point(x1 + (x2 - x1) / 2, y1 + (y2 - y1) / 2)
+        self.win.draw_line(Line(start, end), fill_color)
+
+
+if __name__ == "__main__":
+    # python3 replay.py [log]: replay a saved log, or record a fresh maze
+    # first. space pauses, n steps, +/- change the speed, Home/End seek.
+    from maze import Maze
+    from window import Window
+    if len(sys.argv) > 1:
+        log = EventLog.load(sys.argv[1])
+    else:
+        log = record(Maze(0, 0, 10, 20, 40, 40, carve=False))
+    win = Window(log.num_cols * 40 + 20, log.num_rows * 40 + 20)
+    replay = Replay(log, win, 10, 10, 40, 40)
+    scheduler = replay.play(interval_ms=50)
+    scheduler.bind_keys()
+    win.bind("<Home>", lambda event: replay.seek(0))
+    win.bind("<End>", lambda event: replay.seek(len(replay)))
+    win.wait_for_close()
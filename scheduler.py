@@ -0,0 +1,94 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from window import Window
+
+
+class Scheduler:
+    # Runs a step generator (e.g. chained Maze.carve_steps() and
+    # Maze.solve_steps()) from the Tk event loop. Each tick advances up to
+    # `steps_per_frame` steps, flushes the window's queued drawing once and
+    # schedules the next tick with after(), so the UI stays responsive and
+    # nothing runs while paused or finished.
+    def __init__(self, win: Window, steps, steps_per_frame=1, interval_ms=16, on_done=None):
+        if steps_per_frame < 1:
+            raise ValueError("steps_per_frame must be at least 1")
+        self._win = win
+        self._steps = iter(steps)
+        self.steps_per_frame = steps_per_frame
+        self.interval_ms = interval_ms
+        self._on_done = on_done
+        self._after_id = None
+        self.paused = True
+        self.done = False
+        self.result = None
+        self.steps_run = 0
+
+    def start(self):
+        self.resume()
+
+    def resume(self):
+        if self.done or not self.paused:
+            return
+        self.paused = False
+        self._schedule()
+
+    def pause(self):
+        self.paused = True
+        if self._after_id is not None:
+            self._win.after_cancel(self._after_id)
+            self._after_id = None
+
+    def toggle(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def set_speed(self, steps_per_frame=None, interval_ms=None):
+        if steps_per_frame is not None:
+            if steps_per_frame < 1:
+                raise ValueError("steps_per_frame must be at least 1")
+            self.steps_per_frame = steps_per_frame
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+
+    def step(self):
+        # advance exactly one step; meant for use while paused
+        self._advance(1)
+        self._win.flush()
+
+    def bind_keys(self):
+        # space: pause/resume, n: single step, +/-: double/halve the speed
+        self._win.bind("<space>", lambda event: self.toggle())
+        self._win.bind("n", lambda event: self.step())
+        self._win.bind("+", lambda event: self.set_speed(self.steps_per_frame * 2))
+        self._win.bind("-", lambda event: self.set_speed(max(1, self.steps_per_frame // 2)))
+
+    def _schedule(self):
+        self._after_id = self._win.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        if self.paused:
+            return
+        self._advance(self.steps_per_frame)
+        self._win.flush()
+        if not self.done:
+            self._schedule()
+
+    def _advance(self, count):
+        if self.done:
+            return
+        for _ in range(count):
+            try:
+                next(self._steps)
+            except StopIteration as finished:
+                self.done = True
+                self.paused = True
+                self.result = finished.value
+                if self._on_done is not None:
+                    self._on_done(self.result)
+                return
+            self.steps_run += 1
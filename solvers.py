@@ -0,0 +1,179 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass, field
+from grid import Grid
+import heapq
+import time
+
+
+@dataclass
+class SolveResult:
+    # path is a list of (col, row) from start to goal, empty if unreachable
+    algorithm: str
+    path: list = field(default_factory=list)
+    expanded: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def found(self):
+        return bool(self.path)
+
+    def __bool__(self):
+        return self.found
+
+
+# Every solver takes (grid, start index, goal index) and returns
+# (path as a list of indices, number of cells expanded). They only read the
+# grid's wall bits and keep their own bookkeeping, so the grid's visited
+# flags and any Cell drawing state are left untouched.
+
+def _walk_back(parents, goal):
+    path = [goal]
+    while parents[path[-1]] != path[-1]:
+        path.append(parents[path[-1]])
+    path.reverse()
+    return path
+
+
+def dfs(grid: Grid, start, goal, stats=None):
+    # directions are tried right, down, left, up like the animated solver.
+    # A `stats` dict, if given, gets "backtracks" (cells backed out of) and
+    # "stack" (the deepest the stack got).
+    visited = bytearray(len(grid))
+    visited[start] = 1
+    expanded = 1
+    backtracks = 0
+    peak = 1
+    stack = [start]
+    while stack:
+        i = stack[-1]
+        if i == goal:
+            break
+        for next_index in grid.neighbors(i):
+            if not visited[next_index]:
+                visited[next_index] = 1
+                expanded += 1
+                stack.append(next_index)
+                break
+        else:
+            # the stack only shrinks here, so its peak is always seen
+            # right before a pop (or at the goal)
+            if len(stack) > peak:
+                peak = len(stack)
+            backtracks += 1
+            stack.pop()
+    if stats is not None:
+        stats["backtracks"] = backtracks
+        stats["stack"] = max(peak, len(stack))
+    return stack, expanded
+
+
+def bfs(grid: Grid, start, goal):
+    parents = [-1] * len(grid)
+    parents[start] = start
+    expanded = 0
+    queue = deque([start])
+    while queue:
+        i = queue.popleft()
+        expanded += 1
+        if i == goal:
+            return _walk_back(parents, goal), expanded
+        for next_index in grid.neighbors(i):
+            if parents[next_index] < 0:
+                parents[next_index] = i
+                queue.append(next_index)
+    return [], expanded
+
+
+def astar(grid: Grid, start, goal):
+    # Manhattan distance is exact in an open grid, so it is admissible here
+    num_cols = grid.num_cols
+    goal_row, goal_col = divmod(goal, num_cols)
+    parents = [-1] * len(grid)
+    parents[start] = start
+    cost = {start: 0}
+    expanded = 0
+    row, col = divmod(start, num_cols)
+    heap = [(abs(goal_col - col) + abs(goal_row - row), 0, start)]
+    while heap:
+        _, g, i = heapq.heappop(heap)
+        if g > cost[i]:
+            continue
+        expanded += 1
+        if i == goal:
+            return _walk_back(parents, goal), expanded
+        for next_index in grid.neighbors(i):
+            next_cost = g + 1
+            if next_cost < cost.get(next_index, next_cost + 1):
+                cost[next_index] = next_cost
+                parents[next_index] = i
+                row, col = divmod(next_index, num_cols)
+                heapq.heappush(heap, (next_cost + abs(goal_col - col) + abs(goal_row - row), next_cost, next_index))
+    return [], expanded
+
+
+def bidirectional(grid: Grid, start, goal):
+    # BFS from both ends, always growing the smaller frontier by one level
+    if start == goal:
+        return [start], 1
+    forward = {start: start}
+    backward = {goal: goal}
+    forward_frontier = [start]
+    backward_frontier = [goal]
+    expanded = 0
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, other = forward_frontier, forward, backward
+        else:
+            frontier, parents, other = backward_frontier, backward, forward
+        next_frontier = []
+        meet = None
+        for i in frontier:
+            expanded += 1
+            for next_index in grid.neighbors(i):
+                if next_index in parents:
+                    continue
+                parents[next_index] = i
+                if next_index in other:
+                    meet = next_index
+                    break
+                next_frontier.append(next_index)
+            if meet is not None:
+                break
+        if meet is not None:
+            path = _walk_back(forward, meet)
+            i = meet
+            while backward[i] != i:
+                i = backward[i]
+                path.append(i)
+            return path, expanded
+        if frontier is forward_frontier:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+    return [], expanded
+
+
+SOLVERS = {
+    "dfs": dfs,
+    "bfs": bfs,
+    "astar": astar,
+    "bidirectional": bidirectional,
+}
+
+
+def solve(grid: Grid, algorithm="bfs", start=(0, 0), goal=None, stats=None):
+    # stats is handed to solvers that fill one in (dfs)
+    try:
+        solver = SOLVERS[algorithm]
+    except KeyError:
+        raise ValueError(f"unknown solver {algorithm!r}; expected one of {sorted(SOLVERS)}") from None
+    if goal is None:
+        goal = (grid.num_cols - 1, grid.num_rows - 1)
+    started = time.perf_counter()
+    if stats is None:
+        path, expanded = solver(grid, grid.index(*start), grid.index(*goal))
+    else:
+        path, expanded = solver(grid, grid.index(*start), grid.index(*goal), stats)
+    elapsed = time.perf_counter() - started
+    return SolveResult(algorithm, [grid.position(i) for i in path], expanded, elapsed)
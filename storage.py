@@ -0,0 +1,158 @@
+from __future__ import annotations
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM
+import mmap
+import os
+import struct
+import tempfile
+
+# Binary maze file, little-endian:
+#   header      magic, format version, flags, num_cols, num_rows,
+#               x1, y1, cell_size_x, cell_size_y (float64),
+#               seed length, algorithm length
+#   seed        UTF-8 text of the seed (see FLAG_HAS_SEED / FLAG_STR_SEED)
+#   algorithm   ASCII generator name
+#   left        num_rows bytes, left border of column 0
+#   top         num_cols bytes, top border of row 0
+#   cells       num_cols * num_rows bytes of Grid wall bits, row-major
+MAGIC = b"MAZE"
+VERSION = 1
+FLAG_HAS_SEED = 1
+FLAG_STR_SEED = 2
+_HEADER = struct.Struct("<4sHHII4dHB")
+
+
+class MazeFile:
+    # everything stored in a maze file; `grid` may be backed by an mmap
+    def __init__(self, grid: Grid, seed, algorithm, x1, y1, cell_size_x, cell_size_y):
+        self.grid = grid
+        self.seed = seed
+        self.algorithm = algorithm
+        self.x1 = x1
+        self.y1 = y1
+        self.cell_size_x = cell_size_x
+        self.cell_size_y = cell_size_y
+
+
+def save(path, grid: Grid, seed=None, algorithm="", x1=0, y1=0, cell_size_x=10, cell_size_y=10):
+    flags = 0
+    seed_bytes = b""
+    if seed is not None:
+        if not isinstance(seed, (int, str)):
+            raise TypeError("only int and str seeds can be saved")
+        flags |= FLAG_HAS_SEED
+        if isinstance(seed, str):
+            flags |= FLAG_STR_SEED
+        seed_bytes = str(seed).encode("utf-8")
+    algorithm_bytes = algorithm.encode("ascii")
+    header = _HEADER.pack(
+        MAGIC, VERSION, flags, grid.num_cols, grid.num_rows,
+        x1, y1, cell_size_x, cell_size_y, len(seed_bytes), len(algorithm_bytes),
+    )
+    # The grid may be mapped from `path` itself (see load), so the file is
+    # written beside it and swapped in: truncating a mapped file in place
+    # would pull the pages out from under the grid being saved.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(header)
+            out.write(seed_bytes)
+            out.write(algorithm_bytes)
+            out.write(grid.left)
+            out.write(grid.top)
+            out.write(grid.wall_bytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load(path, use_mmap=True):
+    # With use_mmap the cell array is a copy-on-write memoryview of the file
+    # mapping: opening is O(header) and pages are read lazily as solvers
+    # touch them. Edits (visited flags, wall changes) stay private to this
+    # process and never reach the file.
+    with open(path, "rb") as source:
+        if use_mmap:
+            data = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_COPY)
+        else:
+            data = bytearray(source.read())
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path!s} is too short to be a maze file")
+    (magic, version, flags, num_cols, num_rows, x1, y1, cell_size_x, cell_size_y,
+     seed_length, algorithm_length) = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path!s} is not a maze file")
+    if version != VERSION:
+        raise ValueError(f"unsupported maze file version {version}")
+    offset = _HEADER.size
+    seed = None
+    if flags & FLAG_HAS_SEED:
+        seed = bytes(data[offset:offset + seed_length]).decode("utf-8")
+        if not flags & FLAG_STR_SEED:
+            seed = int(seed)
+    offset += seed_length
+    algorithm = bytes(data[offset:offset + algorithm_length]).decode("ascii")
+    offset += algorithm_length
+    left = data[offset:offset + num_rows]
+    offset += num_rows
+    top = data[offset:offset + num_cols]
+    offset += num_cols
+    end = offset + num_cols * num_rows
+    if len(data) < end:
+        raise ValueError(f"{path!s} is truncated")
+    cells = memoryview(data)[offset:end]
+    grid = Grid(num_cols, num_rows, cells, left, top)
+    return MazeFile(grid, seed, algorithm, x1, y1, cell_size_x, cell_size_y)
+
+
+def to_text(grid: Grid):
+    # ASCII art, two characters per cell:
+    #   +  +--+
+    #   |     |
+    #   +--+  +
+    lines = []
+    for row in range(grid.num_rows):
+        top = ["+"]
+        middle = []
+        for col in range(grid.num_cols):
+            top.append("--+" if grid.has_wall(col, row, "top") else "  +")
+            middle.append("|" if grid.has_wall(col, row, "left") else " ")
+            middle.append("  ")
+        middle.append("|" if grid.has_wall(grid.num_cols - 1, row, "right") else " ")
+        lines.append("".join(top))
+        lines.append("".join(middle))
+    bottom = ["+"]
+    for col in range(grid.num_cols):
+        bottom.append("--+" if grid.has_wall(col, grid.num_rows - 1, "bottom") else "  +")
+    lines.append("".join(bottom))
+    return "\n".join(lines) + "\n"
+
+
+def from_text(text):
+    lines = text.rstrip("\n").split("\n")
+    if len(lines) < 3 or len(lines) % 2 == 0:
+        raise ValueError("maze text must have an odd number of lines, at least 3")
+    width = max(len(line) for line in lines)
+    if (width - 1) % 3:
+        raise ValueError("maze text lines must be 3 * columns + 1 characters wide")
+    lines = [line.ljust(width) for line in lines]
+    num_rows = (len(lines) - 1) // 2
+    num_cols = (width - 1) // 3
+    if num_rows == 0 or num_cols == 0:
+        raise ValueError("maze text has no cells")
+    grid = Grid(num_cols, num_rows)
+    cells = grid.cells
+    for col in range(num_cols):
+        grid.top[col] = lines[0][3 * col + 1] == "-"
+    for row in range(num_rows):
+        middle = lines[2 * row + 1]
+        below = lines[2 * row + 2]
+        grid.left[row] = middle[0] == "|"
+        for col in range(num_cols):
+            bits = 0
+            if middle[3 * col + 3] == "|":
+                bits |= WALL_RIGHT
+            if below[3 * col + 1] == "-":
+                bits |= WALL_BOTTOM
+            cells[row * num_cols + col] = bits
+    return grid
@@ -1,9 +1,30 @@
 import unittest
 from unittest.mock import patch
 
-from window import Point, Line
+from window import Point, Line, Renderer, CanvasItems
 from cell import Cell
 from maze import Maze
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM, RIGHT_FLAGS, flag_runs
+from solvers import SOLVERS
+from generators import GENERATORS, eller_rows, write_rows
+from scheduler import Scheduler
+import export
+import storage
+import mazesolver
+import benchmarks
+from viewport import Viewport
+from chunked import ChunkedMaze
+from tiled import tiled_grid
+from treeindex import TreeIndex
+from distances import DistanceCache, DistanceField
+from analytics import analyze, degrees
+from replay import EventLog, Replay, record
+import events
+from metrics import Metrics
+import os
+import re
+import tempfile
+from itertools import chain
 
 
 class TestWindow:
@@ -36,10 +57,11 @@ class TestWindow:
 
 
 class FakeCanvas:
-    """A minimal canvas replacement that records create_line calls."""
+    """A minimal canvas replacement that records create_line/itemconfig calls."""
 
     def __init__(self):
         self.calls = []
+        self.configured = []
 
     def create_line(self, x1, y1, x2, y2, fill=None, width=None):
         self.calls.append({
@@ -50,6 +72,10 @@ class FakeCanvas:
             "fill": fill,
             "width": width,
         })
+        return len(self.calls)
+
+    def itemconfig(self, item, fill=None):
+        self.configured.append((item, fill))
 
 
 class MazeTests(unittest.TestCase):
@@ -134,7 +160,7 @@ class MazeTests(unittest.TestCase):
         _, color = win.drawn[0]
         self.assertEqual(color, "red")
 
-    @patch("maze.time.sleep", return_value=None)
+    @patch("window.time.sleep", return_value=None)
     def test_maze_creates_expected_grid(self, _sleep):
         # create a small maze with a test window so cells get real coordinates
         win = TestWindow()
@@ -149,7 +175,7 @@ class MazeTests(unittest.TestCase):
             for row in range(num_rows):
                 self.assertIs(m._Maze__cells[col][row]._win, win)
 
-    @patch("maze.time.sleep", return_value=None)
+    @patch("window.time.sleep", return_value=None)
     def test_reset_cells_visited_clears_flags(self, _sleep):
         # Use a small maze; after construction __reset_cells_visited should
         # ensure every Cell.visited is False
@@ -159,7 +185,7 @@ class MazeTests(unittest.TestCase):
             for row in range(m.num_rows):
                 self.assertFalse(m._Maze__cells[col][row].visited)
 
-    @patch("maze.time.sleep", return_value=None)
+    @patch("window.time.sleep", return_value=None)
     def test_maze_zero_dimensions(self, _sleep):
         # creating a maze with zero rows/cols should raise a ValueError
         with self.assertRaises(ValueError):
@@ -172,7 +198,7 @@ class MazeTests(unittest.TestCase):
         with self.assertRaises(TypeError):
             Maze(0, 0, 3, "4", 10, 10)
 
-    @patch("maze.time.sleep", return_value=None)
+    @patch("window.time.sleep", return_value=None)
     def test_entrance_and_exit_broken(self, _sleep):
         win = TestWindow()
         m = Maze(0, 0, 2, 2, 10, 10, win=win)
@@ -181,7 +207,7 @@ class MazeTests(unittest.TestCase):
         # bottom-right exit (bottom wall removed)
         self.assertFalse(m._Maze__cells[m.num_cols - 1][m.num_rows - 1].has_bottom_wall)
 
-    @patch("maze.time.sleep", return_value=None)
+    @patch("window.time.sleep", return_value=None)
     def test_maze_generation_with_seed(self, _sleep):
         win = TestWindow()
         # Use a fixed seed so generation is deterministic. Check that at least
@@ -204,7 +230,7 @@ class MazeTests(unittest.TestCase):
                 break
         self.assertTrue(removed_wall_found, "Expected at least one wall to be removed during generation")
 
-    @patch("maze.time.sleep", return_value=None)
+    @patch("window.time.sleep", return_value=None)
     def test_animate_calls_redraw(self, _sleep):
         # TestWindow.redraw will be instrumented to count calls
         class CountingWindow(TestWindow):
@@ -220,7 +246,7 @@ class MazeTests(unittest.TestCase):
         # __animate is called during construction several times; ensure redraw was called
         self.assertGreater(win.redraw_calls, 0)
 
-    @patch("maze.time.sleep", return_value=None)
+    @patch("window.time.sleep", return_value=None)
     def test_resize_called_with_expected_dimensions(self, _sleep):
         win = TestWindow()
         num_cols = 5
@@ -235,5 +261,1100 @@ class MazeTests(unittest.TestCase):
         self.assertEqual(win.height, needed_h)
 
 
+    def test_large_maze_generates_and_solves_without_recursion(self):
+        # far deeper than the default recursion limit allows for a
+        # recursive carve/solve
+        m = Maze(0, 0, 120, 120, 10, 10, seed=7)
+        self.assertTrue(m.solve())
+
+    def test_maze_generation_is_deterministic_for_seed(self):
+        def walls(m):
+            return [
+                [(c.has_left_wall, c.has_right_wall, c.has_top_wall, c.has_bottom_wall) for c in column]
+                for column in m._Maze__cells
+            ]
+        a = Maze(0, 0, 6, 9, 10, 10, seed=1234)
+        b = Maze(0, 0, 6, 9, 10, 10, seed=1234)
+        self.assertEqual(walls(a), walls(b))
+
+    def test_mazes_own_their_random_state(self):
+        import random
+        from concurrent.futures import ThreadPoolExecutor
+        serial = {seed: Maze(0, 0, 30, 30, 10, 10, seed=seed, algorithm="wilson").grid.wall_bytes() for seed in range(8)}
+        # threads interleave their draws, and the global generator is reseeded
+        # underneath them; neither may leak into a maze
+        def build(seed):
+            random.seed(99)
+            return seed, Maze(0, 0, 30, 30, 10, 10, seed=seed, algorithm="wilson").grid.wall_bytes()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            self.assertEqual(dict(pool.map(build, range(8))), serial)
+
+    def test_unseeded_maze_records_a_reproducible_seed(self):
+        m = Maze(0, 0, 8, 8, 10, 10)
+        self.assertIsInstance(m.seed, int)
+        self.assertEqual(Maze(0, 0, 8, 8, 10, 10, seed=m.seed).grid.wall_bytes(), m.grid.wall_bytes())
+
+    @patch("window.time.sleep")
+    def test_headless_maze_never_sleeps_or_draws(self, sleep):
+        m = Maze(0, 0, 20, 20, 10, 10, seed=3)
+        self.assertTrue(m.solve())
+        sleep.assert_not_called()
+        self.assertEqual(m._Maze__cells._views, {})
+
+    @patch("window.time.sleep")
+    def test_renderer_frame_delay_is_configurable(self, sleep):
+        win = TestWindow()
+        m = Maze(0, 0, 2, 2, 10, 10, renderer=Renderer(win, delay=0))
+        self.assertIs(m.win, win)
+        sleep.assert_not_called()
+        Renderer(win, delay=0.25).frame()
+        sleep.assert_called_once_with(0.25)
+
+    def test_importing_maze_does_not_import_tkinter(self):
+        import subprocess
+        import sys
+        code = "import sys, maze; maze.Maze(0, 0, 3, 3, 1, 1); print('tkinter' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "False")
+
+    def test_canvas_items_reuse_segments(self):
+        canvas = FakeCanvas()
+        items = CanvasItems(canvas)
+        c1 = Cell(win=items)
+        c2 = Cell(win=items)
+        items.bg = "white"
+        c1.draw(0, 10, 0, 10)
+        c2.draw(10, 20, 0, 10)
+        items.flush()
+        # the wall shared by both cells is a single item
+        self.assertEqual(len(canvas.calls), 7)
+        for _ in range(50):
+            c1.draw_move(c2)
+            items.flush()
+            c1.draw_move(c2, undo=True)
+            c2.draw(10, 20, 0, 10)
+            items.flush()
+        self.assertEqual(len(canvas.calls), 8)
+        self.assertEqual(len(items), 8)
+        move_colors = [fill for item, fill in canvas.configured if item == 8]
+        self.assertEqual(move_colors[-1], "red")
+
+    def test_canvas_items_batch_updates_until_flush(self):
+        canvas = FakeCanvas()
+        items = CanvasItems(canvas)
+        line = Line(Point(0, 0), Point(5, 0))
+        items.draw_line(line, "gray")
+        items.draw_line(Line(Point(5, 0), Point(0, 0)), "red")
+        self.assertEqual(canvas.calls, [])
+        items.flush()
+        self.assertEqual(len(canvas.calls), 1)
+        self.assertEqual(canvas.calls[0]["fill"], "red")
+
+
+class SolverTests(unittest.TestCase):
+    def test_all_solvers_agree_on_perfect_maze(self):
+        m = Maze(0, 0, 15, 12, 10, 10, seed=5)
+        paths = {name: m.solve(algorithm=name).path for name in SOLVERS}
+        reference = paths["bfs"]
+        self.assertEqual(reference[0], (0, 0))
+        self.assertEqual(reference[-1], (11, 14))
+        for (c1, r1), (c2, r2) in zip(reference, reference[1:]):
+            self.assertEqual(abs(c1 - c2) + abs(r1 - r2), 1)
+        # a perfect maze has exactly one route, so every solver must find it
+        for name, path in paths.items():
+            self.assertEqual(path, reference, name)
+
+    def test_solve_reports_stats_and_leaves_grid_untouched(self):
+        m = Maze(0, 0, 10, 10, 10, 10, seed=9)
+        before = bytes(m.grid.cells)
+        result = m.solve(algorithm="astar")
+        self.assertTrue(result)
+        self.assertEqual(result.algorithm, "astar")
+        self.assertGreaterEqual(result.expanded, len(result.path))
+        self.assertGreaterEqual(result.elapsed, 0)
+        self.assertEqual(bytes(m.grid.cells), before)
+
+    @patch("window.time.sleep", return_value=None)
+    def test_animated_dfs_returns_path(self, _sleep):
+        m = Maze(0, 0, 5, 5, 10, 10, win=TestWindow(), seed=2)
+        result = m.solve()
+        self.assertEqual(result.path, Maze(0, 0, 5, 5, 10, 10, seed=2).solve(algorithm="bfs").path)
+        # a second animated solve starts afresh
+        self.assertEqual(m.solve().path, result.path)
+
+    def test_unknown_solver_raises(self):
+        m = Maze(0, 0, 2, 2, 10, 10)
+        with self.assertRaises(ValueError):
+            m.solve(algorithm="teleport")
+
+
+class GeneratorTests(unittest.TestCase):
+    def assertPerfect(self, grid):
+        # a perfect maze is a spanning tree: n - 1 passages and every cell
+        # reachable from the entrance
+        cols = grid.num_cols
+        passages = sum(1 for i in range(len(grid)) if i % cols != cols - 1 and not grid.has_wall(i % cols, i // cols, "right"))
+        passages += sum(1 for i in range(len(grid) - cols) if not grid.has_wall(i % cols, i // cols, "bottom"))
+        self.assertEqual(passages, len(grid) - 1)
+        seen = {0}
+        stack = [0]
+        while stack:
+            for j in grid.neighbors(stack.pop()):
+                if j not in seen:
+                    seen.add(j)
+                    stack.append(j)
+        self.assertEqual(len(seen), len(grid))
+
+    def test_every_generator_builds_a_perfect_maze(self):
+        for name in GENERATORS:
+            for rows, cols in ((1, 1), (1, 6), (6, 1), (9, 13)):
+                with self.subTest(algorithm=name, rows=rows, cols=cols):
+                    m = Maze(0, 0, rows, cols, 10, 10, seed=11, algorithm=name)
+                    self.assertPerfect(m.grid)
+                    self.assertFalse(m.grid.has_wall(0, 0, "top"))
+                    self.assertFalse(m.grid.has_wall(cols - 1, rows - 1, "bottom"))
+                    self.assertTrue(m.solve(algorithm="bfs"))
+
+    def test_generators_are_deterministic_for_seed(self):
+        for name in GENERATORS:
+            a = Maze(0, 0, 8, 8, 10, 10, seed=4, algorithm=name)
+            b = Maze(0, 0, 8, 8, 10, 10, seed=4, algorithm=name)
+            self.assertEqual(a.grid.cells, b.grid.cells, name)
+
+    @patch("window.time.sleep", return_value=None)
+    def test_non_dfs_generator_draws_final_layout(self, _sleep):
+        win = TestWindow()
+        m = Maze(0, 0, 3, 3, 10, 10, win=win, algorithm="kruskal")
+        self.assertEqual(len(win.drawn), 4 * 9 + 8)
+
+    def test_tiled_generation_is_perfect_and_independent_of_workers(self):
+        for name in ("kruskal", "dfs", "eller"):
+            with self.subTest(algorithm=name):
+                # 23 x 17 does not divide into 5 x 5 tiles, so the last
+                # row and column of tiles are partial
+                serial = tiled_grid(23, 17, 42, algorithm=name, tile_size=5, workers=1)
+                self.assertPerfect(serial)
+                pooled = tiled_grid(23, 17, 42, algorithm=name, tile_size=5, workers=2)
+                self.assertEqual(bytes(pooled.cells), bytes(serial.cells))
+                self.assertEqual(serial.wall_bytes(), bytes(serial.cells))
+        self.assertNotEqual(
+            bytes(tiled_grid(23, 17, 43, tile_size=5, workers=1).cells),
+            bytes(tiled_grid(23, 17, 42, tile_size=5, workers=1).cells),
+        )
+
+    def test_tiled_maze_is_solvable(self):
+        m = Maze.tiled(0, 0, 30, 40, 10, 10, seed=8, tile_size=16, workers=1)
+        self.assertEqual(m.seed, 8)
+        self.assertTrue(m.solve("bfs"))
+        self.assertPerfect(m.grid)
+
+    def test_tiled_dfs_maze_solves_step_by_step(self):
+        m = Maze.tiled(0, 0, 20, 30, 10, 10, seed=8, algorithm="dfs", tile_size=8, workers=1)
+        steps = m.solve_steps()
+        while True:
+            try:
+                next(steps)
+            except StopIteration as finished:
+                path, _ = finished.value
+                break
+        self.assertEqual([m.grid.position(i) for i in path], m.solve("dfs").path)
+        self.assertTrue(path)
+
+    def test_eller_rows_stream_to_sinks(self):
+        import io
+        import random
+
+        class SocketSink:
+            def __init__(self):
+                self.chunks = []
+
+            def sendall(self, data):
+                self.chunks.append(data)
+
+        buffer = io.BytesIO()
+        self.assertEqual(write_rows(eller_rows(7, 5, random.Random(3)), buffer), 5)
+        sock = SocketSink()
+        write_rows(eller_rows(7, 5, random.Random(3)), sock)
+        self.assertEqual(b"".join(sock.chunks), buffer.getvalue())
+        # the stream carries the same wall bits the grid generator writes
+        grid = Grid(7, 5)
+        grid.cells[:] = buffer.getvalue()
+        self.assertPerfect(grid)
+
+    def test_unknown_generator_raises(self):
+        with self.assertRaises(ValueError):
+            Maze(0, 0, 2, 2, 10, 10, algorithm="magic")
+
+
+class FakeAfterWindow(TestWindow):
+    """TestWindow with a manual after() queue so scheduler ticks can be run
+    one at a time."""
+
+    def __init__(self):
+        super().__init__()
+        self.callbacks = {}
+        self.next_id = 0
+        self.flushes = 0
+        self.bindings = {}
+
+    def after(self, delay_ms, callback):
+        self.next_id += 1
+        self.callbacks[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        del self.callbacks[after_id]
+
+    def flush(self):
+        self.flushes += 1
+
+    def bind(self, sequence, callback):
+        self.bindings[sequence] = callback
+
+    def run_pending(self):
+        pending = list(self.callbacks.values())
+        self.callbacks.clear()
+        for callback in pending:
+            callback()
+
+
+class MetricsTests(unittest.TestCase):
+    def test_headless_counters_and_peaks(self):
+        import json
+        metrics = Metrics()
+        m = Maze(0, 0, 12, 15, 10, 10, seed=6, metrics=metrics)
+        steps = m.solve_steps()
+        while True:
+            try:
+                next(steps)
+            except StopIteration as finished:
+                path, expanded = finished.value
+                break
+        counters = metrics.counters
+        # every cell but the first is carved into and every cell is popped
+        self.assertEqual(counters["carve.cells"], 12 * 15 - 1)
+        self.assertEqual(counters["carve.backtracks"], 12 * 15)
+        self.assertEqual(counters["solve.cells"], expanded - 1)
+        # the solver stops with exactly the path on its stack
+        self.assertEqual(metrics.peaks["solve.stack"], len(path))
+        self.assertEqual(counters["solve.cells"] - counters["solve.backtracks"], len(path) - 1)
+        self.assertEqual(set(metrics.timings), {"carve", "reset_visited", "solve"})
+        self.assertEqual(json.loads(metrics.to_json()), metrics.to_dict())
+
+    def test_headless_default_solve_records_backtracks_and_stack(self):
+        metrics = Metrics()
+        m = Maze(0, 0, 30, 30, 10, 10, seed=6, metrics=metrics)
+        result = m.solve()
+        self.assertEqual(metrics.counters["solve.expanded"], result.expanded)
+        self.assertGreaterEqual(metrics.peaks["solve.stack"], len(result.path))
+        self.assertGreater(metrics.counters["solve.backtracks"], 0)
+        self.assertEqual(result.path, m.solve("bfs").path)
+        # the same figures the step solver reports for the same search
+        steps = Metrics()
+        stepped = Maze(0, 0, 30, 30, 10, 10, seed=6, metrics=steps)
+        list(stepped.solve_steps())
+        self.assertEqual(steps.counters["solve.backtracks"], metrics.counters["solve.backtracks"])
+        self.assertEqual(steps.peaks["solve.stack"], metrics.peaks["solve.stack"])
+        # headless DFS never touches the VISITED flags
+        self.assertEqual(bytes(m.grid.cells), m.grid.wall_bytes())
+
+    @patch("window.time.sleep")
+    def test_draw_calls_and_callbacks(self, _sleep):
+        win = TestWindow()
+        metrics = Metrics()
+        seen = []
+        metrics.add_callback(lambda phase, event: seen.append(phase))
+        m = Maze(0, 0, 4, 4, 10, 10, win=win, seed=2, metrics=metrics)
+        self.assertTrue(m.solve())
+        self.assertEqual(metrics.counters["draw_line"], len(win.drawn))
+        self.assertGreater(metrics.counters["redraw"], 0)
+        self.assertEqual(seen.count("carve"), metrics.counters["carve.cells"] + metrics.counters["carve.backtracks"])
+        self.assertIn("solve", seen)
+        self.assertIn("create_cells", metrics.timings)
+
+    def test_profile_output(self):
+        import pstats
+        metrics = Metrics(profile=True)
+        m = Maze(0, 0, 10, 10, 10, 10, seed=1, algorithm="kruskal", metrics=metrics)
+        m.solve("astar")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "maze.prof")
+            metrics.dump_stats(path)
+            functions = {name for _, _, name in pstats.Stats(path).stats}
+        self.assertIn("kruskal", functions)
+        self.assertIn("astar", functions)
+        with self.assertRaises(RuntimeError):
+            Metrics().dump_stats(path)
+
+
+class TaggedCanvas:
+    """Canvas double keeping items with their coordinates and tags, enough
+    for Viewport's create/move/delete-by-tag usage."""
+
+    def __init__(self):
+        self.items = {}
+        self.created = 0
+
+    def _create(self, kind, coords, tags):
+        self.created += 1
+        self.items[self.created] = (kind, list(coords), tags)
+        return self.created
+
+    def create_line(self, *coords, width=1, tags=()):
+        return self._create("line", coords, tags)
+
+    def create_rectangle(self, *coords, fill=None, outline=None, tags=()):
+        return self._create("rectangle", coords, tags)
+
+    def delete(self, tag):
+        for item in [item for item, (_, _, tags) in self.items.items() if tag in tags]:
+            del self.items[item]
+
+    def move(self, tag, dx, dy):
+        for _, coords, tags in self.items.values():
+            if tag in tags:
+                coords[0::2] = [x + dx for x in coords[0::2]]
+                coords[1::2] = [y + dy for y in coords[1::2]]
+
+
+class ViewportWindow(FakeAfterWindow):
+    def __init__(self, width, height):
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.canvas = TaggedCanvas()
+
+
+class ViewportTests(unittest.TestCase):
+    def wall_segments(self, canvas, scale):
+        # unit wall segments ((x, y), (x', y')) in cell units covered by lines
+        segments = set()
+        for kind, (x1, y1, x2, y2), _ in canvas.items.values():
+            self.assertEqual(kind, "line")
+            a = (round(x1 / scale), round(y1 / scale))
+            b = (round(x2 / scale), round(y2 / scale))
+            if a[1] == b[1]:
+                segments.update(((x, a[1]), (x + 1, a[1])) for x in range(a[0], b[0]))
+            else:
+                segments.update(((a[0], y), (a[0], y + 1)) for y in range(a[1], b[1]))
+        return segments
+
+    def test_close_up_draws_every_wall_once_as_runs(self):
+        m = Maze(0, 0, 40, 50, 10, 10, seed=3, algorithm="kruskal")
+        win = ViewportWindow(2000, 2000)
+        view = Viewport(win, m.grid, scale=10)
+        view.render()
+        expected = set()
+        for row in range(40):
+            for col in range(50):
+                if m.grid.has_wall(col, row, "top"):
+                    expected.add(((col, row), (col + 1, row)))
+                if m.grid.has_wall(col, row, "left"):
+                    expected.add(((col, row), (col, row + 1)))
+                if m.grid.has_wall(col, row, "bottom"):
+                    expected.add(((col, row + 1), (col + 1, row + 1)))
+                if m.grid.has_wall(col, row, "right"):
+                    expected.add(((col + 1, row), (col + 1, row + 1)))
+        self.assertEqual(self.wall_segments(win.canvas, 10), expected)
+        self.assertLess(len(win.canvas.items), len(expected))
+
+    def test_only_visible_tiles_are_drawn_and_panning_draws_exposed_ones(self):
+        m = Maze(0, 0, 300, 300, 10, 10, seed=1, algorithm="sidewinder")
+        win = ViewportWindow(200, 150)
+        view = Viewport(win, m.grid, scale=8)
+        view.render()
+        self.assertEqual(view.visible_tiles(), {(0, 0)})
+        drawn = win.canvas.created
+        # a small pan stays inside the tile: items are moved, none created
+        view.pan(10, 5)
+        self.assertEqual(win.canvas.created, drawn)
+        # crossing into the next tile draws it, and only it
+        view.pan(200, 0)
+        self.assertEqual(view.visible_tiles(), {(0, 0), (1, 0)})
+        view.pan(100, 0)
+        self.assertEqual(view.visible_tiles(), {(1, 0)})
+        self.assertTrue(all("t1_0" in tags for _, _, tags in win.canvas.items.values()))
+        # whatever has been created, the canvas only holds the current view
+        fresh = ViewportWindow(200, 150)
+        other = Viewport(fresh, m.grid, scale=8)
+        other.x, other.y = view.x, view.y
+        other.render()
+        self.assertEqual(len(win.canvas.items), len(fresh.canvas.items))
+
+    def test_zoomed_out_view_draws_density_blocks(self):
+        m = Maze(0, 0, 500, 500, 1, 1, seed=2, algorithm="binary_tree")
+        win = ViewportWindow(250, 250)
+        view = Viewport(win, m.grid, scale=0.5)
+        view.render()
+        kinds = {kind for kind, _, _ in win.canvas.items.values()}
+        self.assertEqual(kinds, {"rectangle"})
+        # a binary tree maze opens exactly one of the two owned walls almost
+        # everywhere, so every block is close to half wall
+        densities = view.densities((0, 0))
+        self.assertTrue(all(0.45 < d < 0.6 for d in densities))
+        self.assertEqual(Viewport(win, Grid(30, 30), scale=0.5).densities((0, 0)), [1.0] * 9)
+
+    def test_wall_edits_redraw_the_view(self):
+        m = Maze(0, 0, 10, 10, 10, 10, seed=5)
+        win = ViewportWindow(200, 200)
+        view = Viewport(win, m.grid, scale=10)
+        view.render()
+        before = self.wall_segments(win.canvas, 10)
+        m.set_wall(4, 4, "right", not m.grid.has_wall(4, 4, "right"))
+        view.render()
+        self.assertEqual(before ^ self.wall_segments(win.canvas, 10), {((5, 4), (5, 5))})
+
+
+class SchedulerTests(unittest.TestCase):
+    def test_scheduler_runs_steps_per_frame(self):
+        win = FakeAfterWindow()
+        scheduler = Scheduler(win, range(10), steps_per_frame=3)
+        scheduler.start()
+        win.run_pending()
+        self.assertEqual(scheduler.steps_run, 3)
+        self.assertEqual(win.flushes, 1)
+        scheduler.set_speed(steps_per_frame=5)
+        win.run_pending()
+        win.run_pending()
+        self.assertTrue(scheduler.done)
+        self.assertEqual(scheduler.steps_run, 10)
+        # nothing is scheduled once the steps are exhausted
+        self.assertEqual(win.callbacks, {})
+
+    def test_pause_resume_and_single_step(self):
+        win = FakeAfterWindow()
+        scheduler = Scheduler(win, range(10))
+        scheduler.start()
+        scheduler.pause()
+        self.assertEqual(win.callbacks, {})
+        scheduler.step()
+        scheduler.step()
+        self.assertEqual(scheduler.steps_run, 2)
+        scheduler.resume()
+        win.run_pending()
+        self.assertEqual(scheduler.steps_run, 3)
+        scheduler.bind_keys()
+        win.bindings["<space>"](None)
+        self.assertTrue(scheduler.paused)
+
+    def test_scheduler_drives_maze_steps_like_a_synchronous_run(self):
+        win = FakeAfterWindow()
+        m = Maze(0, 0, 6, 6, 10, 10, win=win, seed=8, carve=False)
+        results = []
+        scheduler = Scheduler(win, chain(m.carve_steps(), m.solve_steps()), steps_per_frame=7, on_done=results.append)
+        scheduler.start()
+        while not scheduler.done:
+            win.run_pending()
+        reference = Maze(0, 0, 6, 6, 10, 10, seed=8)
+        walls = lambda grid: bytes(b & (WALL_RIGHT | WALL_BOTTOM) for b in grid.cells)
+        self.assertEqual(walls(m.grid), walls(reference.grid))
+        self.assertEqual(results, [None])
+        self.assertTrue(any(color == "gray" for _, color in win.drawn))
+
+    def test_carve_steps_runs_once(self):
+        m = Maze(0, 0, 2, 2, 10, 10)
+        with self.assertRaises(RuntimeError):
+            list(m.carve_steps())
+
+
+class ExportTests(unittest.TestCase):
+    def setUp(self):
+        self.maze = Maze(0, 0, 3, 4, 4, 4, seed=1)
+
+    def pixel(self, raster, x, y):
+        return raster.pixels[y * raster.width + x]
+
+    def test_rasterize_matches_wall_grid(self):
+        raster = export.rasterize(self.maze)
+        grid = self.maze.grid
+        for row in range(grid.num_rows):
+            for col in range(grid.num_cols):
+                x1, x2, y1, y2 = self.maze.cell_bounds(col, row)
+                mid_x = (x1 + x2) // 2
+                mid_y = (y1 + y2) // 2
+                self.assertEqual(self.pixel(raster, x2, mid_y) == export.WALL, grid.has_wall(col, row, "right"))
+                self.assertEqual(self.pixel(raster, mid_x, y2) == export.WALL, grid.has_wall(col, row, "bottom"))
+                self.assertEqual(self.pixel(raster, x1, mid_y) == export.WALL, grid.has_wall(col, row, "left"))
+                self.assertEqual(self.pixel(raster, mid_x, y1) == export.WALL, grid.has_wall(col, row, "top"))
+
+    def test_rasterize_draws_path(self):
+        path = self.maze.solve(algorithm="bfs").path
+        raster = export.rasterize(self.maze, path, cell_size=6)
+        for col, row in path:
+            self.assertEqual(self.pixel(raster, 6 + col * 6 + 3, 6 + row * 6 + 3), export.PATH)
+
+    def test_ppm_and_png_output(self):
+        import io
+        import struct
+        import zlib
+        raster = export.rasterize(self.maze, cell_size=3)
+        ppm = io.BytesIO()
+        export.write_ppm(raster, ppm)
+        header = b"P6\n%d %d\n255\n" % (raster.width, raster.height)
+        self.assertTrue(ppm.getvalue().startswith(header))
+        self.assertEqual(len(ppm.getvalue()), len(header) + raster.width * raster.height * 3)
+        png = io.BytesIO()
+        export.write_png(raster, png)
+        data = png.getvalue()
+        self.assertTrue(data.startswith(b"\x89PNG\r\n\x1a\n"))
+        # walk the chunks and decompress the image data back to the pixels
+        offset = 8
+        idat = b""
+        while offset < len(data):
+            length, = struct.unpack(">I", data[offset:offset + 4])
+            kind = data[offset + 4:offset + 8]
+            if kind == b"IDAT":
+                idat += data[offset + 8:offset + 8 + length]
+            offset += 12 + length
+        scanlines = zlib.decompress(idat)
+        stride = raster.width + 1
+        rows = b"".join(scanlines[y * stride + 1:(y + 1) * stride] for y in range(raster.height))
+        self.assertEqual(rows, bytes(raster.pixels))
+
+    def test_svg_merges_wall_runs(self):
+        svg = export.to_svg(Maze(0, 0, 3, 3, 10, 10, algorithm="binary_tree", seed=2))
+        self.assertIn("<path", svg)
+        # the whole right border is a single vertical run
+        self.assertIn("M30 0v30", svg)
+
+    def test_svg_path_draws_exactly_the_walls(self):
+        # wide enough that runs cross the 8-cell stretches the lines are
+        # translated in; the path is traced back into unit wall segments
+        m = Maze(0, 0, 21, 19, 10, 10, algorithm="sidewinder", seed=5)
+        svg = export.to_svg(m, cell_size=1, margin=0)
+        d = svg.split('<path d="')[1].split('"')[0]
+        drawn = set()
+        x = y = 0
+        for op, args in re.findall(r"([MmhHvV])([^MmhHvV]*)", d):
+            values = [int(v) for v in args.split()]
+            if op == "M":
+                x, y = values
+            elif op == "m":
+                x, y = x + values[0], y + values[1]
+            elif op == "h":
+                drawn.update(("h", x + k, y) for k in range(values[0]))
+                x += values[0]
+            else:
+                drawn.update(("v", x, y + k) for k in range(values[0]))
+                y += values[0]
+        grid = m.grid
+        walls = set()
+        for row in range(m.num_rows):
+            for col in range(m.num_cols):
+                if grid.has_wall(col, row, "top"):
+                    walls.add(("h", col, row))
+                if grid.has_wall(col, row, "left"):
+                    walls.add(("v", col, row))
+                if grid.has_wall(col, row, "right"):
+                    walls.add(("v", col + 1, row))
+                if grid.has_wall(col, row, "bottom"):
+                    walls.add(("h", col, row + 1))
+        self.assertEqual(drawn, walls)
+
+    def test_export_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export.export(self.maze, "maze.gif")
+
+
+class StorageTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "maze.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_and_load_round_trip(self):
+        m = Maze(5, 6, 7, 9, 12, 14, seed=21, algorithm="prim")
+        m.save(self.path)
+        loaded = Maze.load(self.path)
+        self.assertEqual((loaded.num_rows, loaded.num_cols), (7, 9))
+        self.assertEqual((loaded.x1, loaded.y1, loaded.cell_size_x, loaded.cell_size_y), (5, 6, 12, 14))
+        self.assertEqual(loaded.algorithm, "prim")
+        self.assertEqual(bytes(loaded.grid.cells), bytes(m.grid.cells))
+        self.assertEqual(loaded.grid.top, m.grid.top)
+        self.assertEqual(loaded.solve(algorithm="bfs").path, m.solve(algorithm="bfs").path)
+
+    def test_load_maps_the_file_copy_on_write(self):
+        m = Maze(0, 0, 4, 4, 10, 10, seed=1)
+        m.save(self.path)
+        loaded = Maze.load(self.path)
+        self.assertIsInstance(loaded.grid.cells, memoryview)
+        loaded.grid.set_wall(1, 1, "right", False)
+        loaded.solve()
+        # private edits never reach the file
+        self.assertEqual(bytes(Maze.load(self.path).grid.cells), bytes(m.grid.cells))
+
+    def test_save_over_the_mapped_source_file(self):
+        Maze(0, 0, 6, 6, 10, 10, seed=4).save(self.path)
+        loaded = Maze.load(self.path)
+        loaded.grid.set_wall(3, 3, "right", False)
+        expected = loaded.grid.wall_bytes()
+        loaded.save(self.path)
+        self.assertEqual(loaded.grid.wall_bytes(), expected)
+        reloaded = Maze.load(self.path)
+        self.assertFalse(reloaded.grid.has_wall(3, 3, "right"))
+        self.assertEqual(reloaded.grid.wall_bytes(), expected)
+        self.assertEqual(os.listdir(self.tmp.name), ["maze.bin"])
+
+    def test_seed_round_trip(self):
+        grid = Grid(2, 2)
+        for seed in (None, 12345678901234567890, "abc", "42"):
+            storage.save(self.path, grid, seed=seed)
+            self.assertEqual(storage.load(self.path, use_mmap=False).seed, seed)
+
+    def test_load_rejects_other_files(self):
+        with open(self.path, "wb") as out:
+            out.write(b"not a maze file at all, just some bytes padding it out")
+        with self.assertRaises(ValueError):
+            Maze.load(self.path)
+
+    def test_text_round_trip(self):
+        m = Maze(0, 0, 4, 6, 10, 10, seed=13)
+        text = m.to_text()
+        self.assertEqual(len(text.splitlines()), 9)
+        self.assertTrue(text.startswith("+  +--+"))
+        copy = Maze.from_text(text)
+        self.assertEqual(copy.grid.cells, m.grid.cells)
+        self.assertEqual(copy.to_text(), text)
+        with self.assertRaises(ValueError):
+            Maze.from_text("+--+\n")
+
+
+class TreeIndexTests(unittest.TestCase):
+    def test_queries_match_a_search_for_every_pair(self):
+        from solvers import solve
+        for name in ("dfs", "kruskal", "sidewinder"):
+            m = Maze(0, 0, 5, 7, 10, 10, seed=4, algorithm=name)
+            index = m.tree_index()
+            cells = [(col, row) for row in range(5) for col in range(7)]
+            for start in cells:
+                for goal in cells:
+                    with self.subTest(algorithm=name, start=start, goal=goal):
+                        path = solve(m.grid, "bfs", start, goal).path
+                        self.assertEqual(index.path(start, goal), path)
+                        self.assertEqual(index.distance(start, goal), len(path) - 1)
+
+    def test_index_is_rebuilt_after_walls_change(self):
+        m = Maze(0, 0, 6, 6, 10, 10, seed=2)
+        index = m.tree_index()
+        self.assertIs(m.tree_index(), index)
+        # close a passage on the solution: the exit is cut off
+        (c1, r1), (c2, r2) = m.solve("bfs").path[:2]
+        side = "right" if c2 > c1 else "left" if c2 < c1 else "bottom" if r2 > r1 else "top"
+        m.grid.set_wall(c1, r1, side, True)
+        self.assertTrue(index.stale)
+        with self.assertRaises(RuntimeError):
+            index.distance((0, 0), (5, 5))
+        rebuilt = m.tree_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertIsNone(rebuilt.distance((0, 0), (5, 5)))
+        self.assertEqual(rebuilt.path((0, 0), (5, 5)), [])
+
+    def test_loops_are_rejected(self):
+        # a 2 x 2 grid with no interior walls is one loop
+        grid = storage.from_text("+--+--+\n|     |\n+  +  +\n|     |\n+--+--+\n")
+        with self.assertRaises(ValueError):
+            TreeIndex(grid)
+
+
+class DistanceTests(unittest.TestCase):
+    def test_field_matches_a_search_from_the_source(self):
+        from solvers import solve
+        # a 2 x 2 grid with no interior walls has a loop, so BFS matters
+        looped = storage.from_text("+--+--+\n|     |\n+  +  +\n|     |\n+--+--+\n")
+        for grid in (Maze(0, 0, 6, 8, 10, 10, seed=3, algorithm="kruskal").grid, looped):
+            field = DistanceField(grid, [(1, 1)])
+            for row in range(grid.num_rows):
+                for col in range(grid.num_cols):
+                    with self.subTest(cell=(col, row)):
+                        path = solve(grid, "bfs", (col, row), (1, 1)).path
+                        self.assertEqual(field.distance(col, row), len(path) - 1)
+                        self.assertEqual(len(field.path(col, row)), len(path))
+                        self.assertEqual(field.path(col, row)[-1], (1, 1))
+
+    def test_several_sources_give_the_nearest(self):
+        m = Maze(0, 0, 5, 5, 10, 10, seed=6)
+        index = m.tree_index()
+        sources = [(0, 0), (4, 4), (2, 3)]
+        field = DistanceField(m.grid, sources)
+        for row in range(5):
+            for col in range(5):
+                nearest = min(index.distance((col, row), source) for source in sources)
+                self.assertEqual(field.distance(col, row), nearest)
+
+    def test_batched_queries_and_eviction(self):
+        m = Maze(0, 0, 6, 6, 10, 10, seed=2)
+        index = m.tree_index()
+        cache = m.distances()
+        self.assertIs(m.distances(), cache)
+        cells = [(col, row) for row in range(6) for col in range(6)]
+        pairs = [(start, goal) for start in cells for goal in cells[:3]]
+        expected = [index.distance(start, goal) for start, goal in pairs]
+        self.assertEqual(cache.query(pairs), expected)
+        # one field per distinct goal, since there are fewer goals than starts
+        self.assertEqual((cache.misses, len(cache)), (3, 3))
+        small = DistanceCache(m.grid, max_fields=2)
+        for source in cells[:4]:
+            small.field(source)
+        self.assertEqual(len(small), 2)
+        small.field(cells[3])
+        self.assertEqual((small.hits, small.misses), (1, 4))
+
+    def test_cache_is_emptied_after_walls_change(self):
+        m = Maze(0, 0, 6, 6, 10, 10, seed=2)
+        cache = m.distances()
+        field = cache.field((5, 5))
+        self.assertEqual(field.distance(0, 0), len(m.solve("bfs").path) - 1)
+        (c1, r1), (c2, r2) = m.solve("bfs").path[:2]
+        side = "right" if c2 > c1 else "bottom"
+        m.set_wall(c1, r1, side, True)
+        self.assertTrue(field.stale)
+        self.assertIsNone(cache.field((5, 5)).distance(0, 0))
+        self.assertEqual(cache.query([((0, 0), (5, 5))]), [None])
+        self.assertEqual(cache.field((5, 5)).path(0, 0), [])
+
+
+class AnalyticsTests(unittest.TestCase):
+    def test_counts_match_a_per_cell_walk(self):
+        for name in GENERATORS:
+            m = Maze(0, 0, 9, 12, 10, 10, seed=5, algorithm=name)
+            grid = m.grid
+            with self.subTest(algorithm=name):
+                expected = [len(grid.neighbors(i)) for i in range(len(grid))]
+                self.assertEqual(list(degrees(grid)), expected)
+                stats = analyze(grid)
+                self.assertTrue(stats["perfect"])
+                self.assertEqual((stats["components"], stats["loops"], stats["passages"]), (1, 0, 12 * 9 - 1))
+                self.assertEqual(stats["dead_ends"], expected.count(1))
+                self.assertEqual(stats["corridors"], expected.count(2))
+                self.assertEqual(stats["junctions"], sum(d > 2 for d in expected))
+                solution = len(m.solve("bfs").path) - 1
+                self.assertEqual(stats["solution_length"], solution)
+                self.assertEqual(stats["river"], (12 * 9 - solution - 1) / expected.count(1))
+                # the stretches between dead ends and junctions cover every passage
+                lengths = stats["corridor_lengths"]
+                self.assertEqual(sum(moves * count for moves, count in lengths.items()), stats["passages"])
+
+    def test_corridor_lengths_match_following_each_corridor(self):
+        def stretches(grid):
+            # walk out of every non-corridor cell along each passage until the
+            # next one; every stretch is walked once from each end
+            degree = [len(grid.neighbors(i)) for i in range(len(grid))]
+            counts = {}
+            for i in range(len(grid)):
+                if degree[i] == 2:
+                    continue
+                for j in grid.neighbors(i):
+                    previous, moves = i, 1
+                    while degree[j] == 2:
+                        previous, j = j, next(k for k in grid.neighbors(j) if k != previous)
+                        moves += 1
+                    counts[moves] = counts.get(moves, 0) + 1
+            return {moves: count // 2 for moves, count in counts.items()}
+
+        for name in ("kruskal", "prim", "wilson", "eller", "dfs"):
+            for seed in range(10):
+                grid = Maze(0, 0, 7, 9, 10, 10, seed=seed, algorithm=name).grid
+                with self.subTest(algorithm=name, seed=seed):
+                    self.assertEqual(analyze(grid)["corridor_lengths"], stretches(grid))
+        # (0, 0) sits in the middle of the only corridor: one stretch, not two
+        u_shape = storage.from_text("+--+--+\n|     |\n+  +  +\n|  |  |\n+--+--+\n")
+        self.assertEqual(analyze(u_shape)["corridor_lengths"], {3: 1})
+
+    def test_loops_and_disconnected_cells(self):
+        # four cells around one loop
+        looped = analyze(storage.from_text("+--+--+\n|     |\n+  +  +\n|     |\n+--+--+\n"))
+        self.assertEqual((looped["loops"], looped["perfect"], looped["solution_length"]), (1, False, 2))
+        # (0, 0) walled in; the rest is one corridor of four moves
+        split = analyze(storage.from_text("+--+--+--+\n|  |     |\n+--+--+  +\n|        |\n+--+--+--+\n"))
+        self.assertEqual((split["components"], split["loops"], split["perfect"]), (2, 0, False))
+        self.assertEqual(split["corridor_lengths"], {4: 1})
+        self.assertIsNone(split["solution_length"])
+        self.assertIsNone(split["river"])
+        self.assertEqual(analyze(Grid(1, 1))["solution_length"], 0)
+
+
+class ReplayTests(unittest.TestCase):
+    def final_colours(self, win):
+        return {line.key(): colour for line, colour in win.drawn}
+
+    def test_pack_round_trip(self):
+        for event in ((events.CARVE, 0, 0, events.RIGHT), (events.UNDO, 2**30 - 1, 12345, events.UP)):
+            self.assertEqual(events.unpack(events.pack(*event)), event)
+        with self.assertRaises(ValueError):
+            events.pack(events.MOVE, 2**30, 0, events.DOWN)
+        stream = [(events.MOVE, 3, 4, events.LEFT), (events.DONE, 0, 2**30 - 1, events.RIGHT)]
+        self.assertEqual(list(events.pack_many(stream)), [events.pack(*event) for event in stream])
+
+    def test_replay_draws_what_a_live_run_draws(self):
+        for name in ("dfs", "kruskal"):
+            with self.subTest(algorithm=name):
+                live = FakeAfterWindow()
+                m = Maze(0, 0, 6, 8, 10, 10, live, seed=3, algorithm=name, carve=False)
+                list(chain(m.carve_steps(), m.solve_steps()))
+                log = record(Maze(0, 0, 6, 8, 10, 10, seed=3, algorithm=name, carve=False))
+                win = FakeAfterWindow()
+                replay = Replay(log, win)
+                replay.seek(len(replay))
+                self.assertEqual(self.final_colours(win), self.final_colours(live))
+                self.assertEqual(replay.grid.wall_bytes(), m.grid.wall_bytes())
+                # back to the start: all walls up and the moves erased
+                replay.seek(0)
+                self.assertEqual(set(self.final_colours(win).values()), {"black", win.bg})
+                replay.seek(len(replay) // 2)
+                replay.seek(len(replay))
+                self.assertEqual(self.final_colours(win), self.final_colours(live))
+
+    def test_record_leaves_the_maze_solvable(self):
+        m = Maze(0, 0, 6, 8, 10, 10, seed=3, carve=False)
+        record(m)
+        self.assertEqual(bytes(m.grid.cells), m.grid.wall_bytes())
+        steps = m.solve_steps()
+        with self.assertRaises(StopIteration) as finished:
+            while True:
+                next(steps)
+        path, _ = finished.exception.value
+        self.assertEqual(path[-1], len(m.grid) - 1)
+
+    def test_play_and_headless_seek(self):
+        m = Maze(0, 0, 5, 5, 10, 10, seed=8, carve=False)
+        log = record(m)
+        self.assertEqual(log[0][0], events.CARVE)
+        headless = Replay(log)
+        headless.seek(len(log))
+        self.assertTrue(headless.done)
+        self.assertEqual(headless.grid.wall_bytes(), m.grid.wall_bytes())
+        win = FakeAfterWindow()
+        replay = Replay(log, win)
+        scheduler = replay.play(steps_per_frame=10)
+        win.run_pending()
+        self.assertEqual(replay.position, 10)
+        replay.seek(len(log) - 1)
+        win.run_pending()
+        self.assertTrue(scheduler.done)
+        self.assertEqual(replay.grid.wall_bytes(), m.grid.wall_bytes())
+
+    def test_save_and_load(self):
+        log = record(Maze(0, 0, 4, 7, 10, 10, seed=1, carve=False))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.mzlog")
+            log.save(path)
+            loaded = EventLog.load(path)
+        self.assertEqual((loaded.num_cols, loaded.num_rows), (7, 4))
+        self.assertEqual(list(loaded), list(log))
+        with self.assertRaises(ValueError):
+            EventLog.from_bytes(log.to_bytes()[:-1])
+
+
+class IncrementalTests(unittest.TestCase):
+    def assertShortest(self, m, result):
+        from solvers import solve
+        self.assertEqual(len(result.path), len(solve(m.grid, "bfs").path))
+        for (c1, r1), (c2, r2) in zip(result.path, result.path[1:]):
+            self.assertIn(m.grid.index(c2, r2), m.grid.neighbors(m.grid.index(c1, r1)))
+
+    def test_repairs_match_a_fresh_search_after_every_edit(self):
+        import random
+        rng = random.Random(0)
+        m = Maze(0, 0, 8, 9, 10, 10, seed=5, algorithm="kruskal")
+        engine = m.incremental_solver()
+        self.assertShortest(m, engine.solve())
+        for _ in range(200):
+            col, row = rng.randrange(9), rng.randrange(8)
+            m.set_wall(col, row, rng.choice(("left", "right", "top", "bottom")), rng.random() < 0.5)
+            self.assertShortest(m, engine.solve())
+
+    def test_single_edit_only_re_expands_part_of_the_maze(self):
+        m = Maze(0, 0, 60, 60, 10, 10, seed=1, algorithm="kruskal")
+        engine = m.incremental_solver()
+        first = engine.solve()
+        # open a wall next to the middle of the solution path
+        for col, row in first.path[len(first.path) // 2:]:
+            if col < 59 and m.grid.has_wall(col, row, "right"):
+                break
+        m.set_wall(col, row, "right", False)
+        repaired = engine.solve()
+        self.assertShortest(m, repaired)
+        self.assertLess(repaired.expanded, first.expanded)
+
+    def test_unreported_edits_fall_back_to_a_full_search(self):
+        m = Maze(0, 0, 6, 6, 10, 10, seed=2)
+        engine = m.incremental_solver()
+        engine.solve()
+        # edits straight on the grid bypass wall_changed()
+        for col in range(5):
+            m.grid.set_wall(col, 0, "right", False)
+        self.assertShortest(m, engine.solve())
+
+    @patch("window.time.sleep")
+    def test_set_wall_redraws_and_validates(self, _sleep):
+        win = TestWindow()
+        m = Maze(0, 0, 3, 3, 10, 10, win=win, seed=1)
+        drawn = len(win.drawn)
+        m.set_wall(1, 1, "top", not m.grid.has_wall(1, 1, "top"))
+        self.assertEqual(len(win.drawn), drawn + 4)
+        with self.assertRaises(IndexError):
+            m.set_wall(3, 0, "left", False)
+        with self.assertRaises(ValueError):
+            m.set_wall(0, 0, "middle", False)
+
+
+class BenchmarkTests(unittest.TestCase):
+    def test_suite_covers_every_case(self):
+        results = benchmarks.run_suite(sizes=(4,))
+        names = {entry["case"] for entry in results["results"]}
+        self.assertTrue({f"generate/{name}" for name in GENERATORS} <= names)
+        self.assertTrue({f"solve/{name}" for name in SOLVERS} <= names)
+        self.assertTrue({"construct", "draw", "render/png", "serialize/load"} <= names)
+        for entry in results["results"]:
+            self.assertEqual(entry["size"], 4)
+            self.assertGreaterEqual(entry["seconds"], 0)
+            self.assertGreater(entry["peak_bytes"], 0)
+
+    def test_compare_flags_regressions_over_threshold(self):
+        def results(*entries):
+            return {"results": [{"case": c, "size": 10, "seconds": s, "peak_bytes": b} for c, s, b in entries]}
+        baseline = results(("a", 1.0, 10**6), ("b", 1.0, 10**6), ("tiny", 0.001, 1000))
+        current = results(("a", 1.2, 1.05 * 10**6), ("b", 1.5, 2 * 10**6), ("tiny", 0.01, 2000), ("new", 9.0, 9000))
+        self.assertEqual(
+            benchmarks.compare(current, baseline),
+            [("b", 10, "seconds", 1.0, 1.5), ("b", 10, "peak_bytes", 10**6, 2 * 10**6)],
+        )
+
+
+class ChunkedMazeTests(unittest.TestCase):
+    def test_chunks_are_deterministic_and_survive_eviction(self):
+        m = ChunkedMaze(seed=9, chunk_size=8, cache_size=2)
+        first = bytes(m.chunk(-3, 5).cells)
+        for x in range(5):
+            m.chunk(x, 0)
+        self.assertEqual(len(m), 2)
+        self.assertGreater(m.evicted, 0)
+        self.assertEqual(bytes(m.chunk(-3, 5).cells), first)
+        self.assertEqual(bytes(ChunkedMaze(seed=9, chunk_size=8).chunk(-3, 5).cells), first)
+        self.assertNotEqual(bytes(ChunkedMaze(seed=10, chunk_size=8).chunk(-3, 5).cells), first)
+
+    def test_every_chunk_border_has_one_opening(self):
+        m = ChunkedMaze(seed=1, chunk_size=6, cache_size=4)
+        for chunk_x, chunk_y in ((0, 0), (-1, 2), (4, -7)):
+            x0, y0 = chunk_x * 6, chunk_y * 6
+            left = [not m.has_wall(x0, y0 + r, "left") for r in range(6)]
+            top = [not m.has_wall(x0 + c, y0, "top") for c in range(6)]
+            self.assertEqual((sum(left), sum(top)), (1, 1))
+            # the neighbour sees the same opening from its side
+            self.assertEqual(left, [not m.has_wall(x0 - 1, y0 + r, "right") for r in range(6)])
+
+    def test_region_is_a_grid_of_joined_perfect_chunks(self):
+        m = ChunkedMaze(seed=4, chunk_size=5, cache_size=3, algorithm="kruskal")
+        grid = m.region(-5, -5, 10, 10)
+        for row in range(10):
+            for col in range(10):
+                for side in ("left", "right", "top", "bottom"):
+                    self.assertEqual(grid.has_wall(col, row, side), m.has_wall(col - 5, row - 5, side))
+        # four perfect chunks joined in a ring: connected, with one loop
+        passages = sum(len(grid.neighbors(i)) for i in range(len(grid))) // 2
+        self.assertEqual(passages, len(grid))
+        self.assertTrue(all(SOLVERS["bfs"](grid, 0, goal)[0] for goal in range(len(grid))))
+
+    def test_solve_across_chunks(self):
+        m = ChunkedMaze(seed=2, chunk_size=16, cache_size=4)
+        result = m.solve((-20, 3), (40, -30))
+        self.assertTrue(result)
+        self.assertEqual((result.path[0], result.path[-1]), ((-20, 3), (40, -30)))
+        for a, b in zip(result.path, result.path[1:]):
+            self.assertIn(b, m.open_neighbors(*a))
+        self.assertLessEqual(len(m), 4)
+
+
+class CommandLineTests(unittest.TestCase):
+    def test_parse_seeds(self):
+        self.assertEqual(mazesolver.parse_seeds("0..3"), [0, 1, 2, 3])
+        self.assertEqual(mazesolver.parse_seeds("5,1..2"), [5, 1, 2])
+        with self.assertRaises(Exception):
+            mazesolver.parse_seeds("4..1")
+
+    def test_pool_results_are_in_seed_order(self):
+        options = {"rows": 6, "cols": 6, "algorithm": "dfs", "solver": "bfs", "out": None, "input": None}
+        seeds = list(range(12))
+        serial = list(mazesolver.run("solve", options, seeds, workers=1))
+        pooled = list(mazesolver.run("solve", options, seeds, workers=2, chunk_size=1))
+        self.assertEqual([r["seed"] for r in pooled], seeds)
+        self.assertEqual([r["length"] for r in pooled], [r["length"] for r in serial])
+
+    def test_generate_then_solve_saved_mazes(self):
+        import io
+        import json
+        with tempfile.TemporaryDirectory() as tmp:
+            out = io.StringIO()
+            err = io.StringIO()
+            mazesolver.main(["generate", "--rows", "4", "--cols", "5", "--seeds", "0..2", "--workers", "1", "--out", tmp], stdout=out, stderr=err)
+            self.assertEqual(len(os.listdir(tmp)), 3)
+            self.assertEqual(json.loads(err.getvalue())["mazes"], 3)
+            out = io.StringIO()
+            mazesolver.main(["solve", "--seeds", "0..2", "--workers", "1", "--input", tmp, "--solver", "astar"], stdout=out, stderr=err)
+            results = [json.loads(line) for line in out.getvalue().splitlines()]
+            self.assertEqual([r["seed"] for r in results], [0, 1, 2])
+            self.assertTrue(all(r["solved"] and r["cells"] == 20 and "load_s" in r for r in results))
+            with self.assertRaises(SystemExit):
+                mazesolver.main(["solve", "--seeds", "0..3", "--input", tmp], stdout=out, stderr=err)
+
+    def test_bad_worker_and_chunk_counts_are_rejected(self):
+        for flags in (["--workers", "0"], ["--chunk-size", "0"]):
+            with self.subTest(flags=flags), self.assertRaises(SystemExit):
+                mazesolver.main(["generate", "--seeds", "0..2"] + flags)
+        with self.assertRaises(ValueError):
+            list(mazesolver.run("generate", {"rows": 2, "cols": 2, "algorithm": "dfs"}, [0], chunk_size=0))
+
+
+class GridTests(unittest.TestCase):
+    def test_wall_flag_runs(self):
+        cells = bytes([WALL_RIGHT, WALL_RIGHT | WALL_BOTTOM, 0, WALL_RIGHT, WALL_BOTTOM | 4])
+        flags = cells.translate(RIGHT_FLAGS)
+        self.assertEqual(flags, b"\x01\x01\x00\x01\x00")
+        self.assertEqual(list(flag_runs(flags)), [(0, 2), (3, 4)])
+        self.assertEqual(list(flag_runs(b"\x01\x01")), [(0, 2)])
+
+    def test_shared_wall_is_stored_once(self):
+        g = Grid(3, 2)
+        g.set_wall(0, 0, "right", False)
+        self.assertFalse(g.has_wall(1, 0, "left"))
+        g.set_wall(1, 1, "top", False)
+        self.assertFalse(g.has_wall(1, 0, "bottom"))
+        self.assertEqual(len(g.cells), 6)
+
+    def test_border_walls(self):
+        g = Grid(2, 2)
+        self.assertTrue(g.has_wall(0, 1, "left"))
+        g.set_wall(1, 0, "top", False)
+        self.assertFalse(g.has_wall(1, 0, "top"))
+        self.assertTrue(g.has_wall(0, 0, "top"))
+        with self.assertRaises(ValueError):
+            g.has_wall(0, 0, "diagonal")
+
+    def test_reset_visited_keeps_walls(self):
+        g = Grid(2, 2)
+        g.set_wall(0, 0, "bottom", False)
+        g.set_visited(0, 0, True)
+        g.set_visited(1, 1, True)
+        g.reset_visited()
+        self.assertFalse(g.is_visited(0, 0))
+        self.assertFalse(g.is_visited(1, 1))
+        self.assertFalse(g.has_wall(0, 0, "bottom"))
+
+    def test_neighbors_follow_open_walls(self):
+        g = Grid(3, 3)
+        g.set_wall(1, 1, "left", False)
+        g.set_wall(1, 1, "bottom", False)
+        self.assertEqual(sorted(g.neighbors(g.index(1, 1))), [g.index(0, 1), g.index(1, 2)])
+
+    def test_cell_view_writes_through_to_grid(self):
+        g = Grid(2, 1)
+        c = Cell(grid=g, col=1, row=0)
+        c.has_left_wall = False
+        self.assertFalse(g.has_wall(0, 0, "right"))
+        c.visited = True
+        self.assertTrue(g.is_visited(1, 0))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
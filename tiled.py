@@ -0,0 +1,127 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from generators import GENERATORS
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM
+from multiprocessing import shared_memory
+import os
+import random
+
+# Tile-parallel generation for mazes too large to carve on one core.
+#
+# The grid is cut into tile_size x tile_size tiles and every tile is carved
+# as an independent perfect maze, with its own generator seeded from
+# (seed, tile column, tile row). Worker processes write their bands of tiles
+# straight into one shared-memory cell array. The tiles are then stitched
+# together along a spanning tree of the tile graph: the tile grid is itself
+# carved as a small maze, and each wall it opens becomes one opening at a
+# random position on the shared border of the two tiles. Every tile is a
+# tree and the tiles are joined by a tree, so the result is a perfect maze.
+#
+# The layout depends only on the seed, size, tile size and algorithm, not on
+# the number of workers or the order in which tiles finish.
+DEFAULT_TILE_SIZE = 512
+
+
+def _tile_rng(seed, tile_col, tile_row):
+    # str seeds are hashed with SHA-512, so this is stable across processes
+    # and independent of PYTHONHASHSEED
+    return random.Random(f"{seed}/{tile_col}/{tile_row}")
+
+
+def _carve_band(cells, num_cols, num_rows, tile_size, seed, algorithm, tile_row):
+    # carve every tile in one row of tiles into `cells`, any writable buffer
+    # holding the full grid
+    generator = GENERATORS[algorithm]
+    top = tile_row * tile_size
+    height = min(tile_size, num_rows - top)
+    for tile_col, left in enumerate(range(0, num_cols, tile_size)):
+        width = min(tile_size, num_cols - left)
+        tile = Grid(width, height)
+        generator(tile, _tile_rng(seed, tile_col, tile_row))
+        # some generators (dfs) leave VISITED set; only walls are copied out
+        tile.reset_visited()
+        # generators leave border walls alone, so the tile's right column and
+        # bottom row still close it off from its neighbours
+        local = tile.cells
+        for row in range(height):
+            start = (top + row) * num_cols + left
+            cells[start:start + width] = local[row * width:(row + 1) * width]
+
+
+def _attach(name):
+    # the parent owns (and unlinks) the block; workers only map it
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no `track` argument
+        return shared_memory.SharedMemory(name=name)
+
+
+def _carve_band_shared(name, num_cols, num_rows, tile_size, seed, algorithm, tile_row):
+    # worker entry point
+    block = _attach(name)
+    try:
+        _carve_band(block.buf, num_cols, num_rows, tile_size, seed, algorithm, tile_row)
+    finally:
+        block.close()
+    return tile_row
+
+
+def _stitch(grid: Grid, tile_size, seed, algorithm):
+    # carve the tile graph as a maze of its own, then open one random wall
+    # on the border of every pair of tiles it joined
+    cells = grid.cells
+    num_cols = grid.num_cols
+    num_rows = grid.num_rows
+    tiles_x = -(-num_cols // tile_size)
+    tiles_y = -(-num_rows // tile_size)
+    tiles = Grid(tiles_x, tiles_y)
+    rng = random.Random(f"{seed}/stitch")
+    GENERATORS[algorithm](tiles, rng)
+    for tile_row in range(tiles_y):
+        top = tile_row * tile_size
+        height = min(tile_size, num_rows - top)
+        for tile_col in range(tiles_x):
+            left = tile_col * tile_size
+            width = min(tile_size, num_cols - left)
+            bits = tiles.cells[tile_row * tiles_x + tile_col]
+            if not bits & WALL_RIGHT and tile_col < tiles_x - 1:
+                row = top + rng.randrange(height)
+                cells[row * num_cols + left + width - 1] &= ~WALL_RIGHT
+            if not bits & WALL_BOTTOM and tile_row < tiles_y - 1:
+                col = left + rng.randrange(width)
+                cells[(top + height - 1) * num_cols + col] &= ~WALL_BOTTOM
+
+
+def tiled_grid(num_cols, num_rows, seed, algorithm="kruskal", tile_size=DEFAULT_TILE_SIZE, workers=None):
+    # Build a perfect maze grid tile by tile, one row of tiles per worker
+    # task. workers=1 carves in this process without shared memory.
+    if algorithm not in GENERATORS:
+        raise ValueError(f"unknown generator {algorithm!r}; expected one of {sorted(GENERATORS)}")
+    if tile_size <= 0:
+        raise ValueError("tile_size must be positive")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    tiles_y = -(-num_rows // tile_size)
+    grid = Grid(num_cols, num_rows)
+    n = len(grid.cells)
+    if workers <= 1 or tiles_y == 1:
+        for tile_row in range(tiles_y):
+            _carve_band(grid.cells, num_cols, num_rows, tile_size, seed, algorithm, tile_row)
+    else:
+        block = shared_memory.SharedMemory(create=True, size=n)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_carve_band_shared, block.name, num_cols, num_rows, tile_size, seed, algorithm, tile_row)
+                    for tile_row in range(tiles_y)
+                ]
+                for future in futures:
+                    future.result()
+            with block.buf[:n] as view:
+                grid.cells[:] = view
+        finally:
+            block.close()
+            block.unlink()
+    _stitch(grid, tile_size, seed, algorithm)
+    return grid
@@ -0,0 +1,130 @@
+from __future__ import annotations
+from array import array
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM
+
+# Distance and path queries between any two cells of a perfect maze.
+#
+# A perfect maze is a spanning tree, so the route between two cells is
+# unique: up from each cell to their lowest common ancestor (LCA). The index
+# roots the tree at one cell and stores every cell's depth and parent, plus
+# one skew-binary jump pointer per cell (the O(n) memory form of binary
+# lifting: jumps along any root path have lengths 1, 1, 3, 7, 15, ...), so
+# the LCA is found in O(log n). distance() is then O(log n) and path() is
+# O(log n + path length), with no search over the grid.
+#
+# The index remembers Grid.version when it was built and refuses to answer
+# once any wall has changed; Maze.tree_index() rebuilds it on demand.
+
+
+class TreeIndex:
+    def __init__(self, grid: Grid, root=0):
+        n = len(grid)
+        self.grid = grid
+        self.root = root
+        self.version = grid.version
+        cells = grid.cells
+        cols = grid.num_cols
+        parent = list(range(n))
+        depth = [-1] * n
+        depth[root] = 0
+        jump = list(parent)
+        # breadth-first over the open walls (Grid.neighbors, inlined); meeting
+        # an already reached cell other than the parent means the passages
+        # form a loop
+        frontier = [root]
+        d = 0
+        while frontier:
+            d += 1
+            next_frontier = []
+            append = next_frontier.append
+            for i in frontier:
+                came_from = parent[i]
+                col = i % cols
+                bits = cells[i]
+                for j, is_open in (
+                    (i + 1, col < cols - 1 and not bits & WALL_RIGHT),
+                    (i + cols, i + cols < n and not bits & WALL_BOTTOM),
+                    (i - 1, col > 0 and not cells[i - 1] & WALL_RIGHT),
+                    (i - cols, i >= cols and not cells[i - cols] & WALL_BOTTOM),
+                ):
+                    if not is_open or j == came_from:
+                        continue
+                    if depth[j] >= 0:
+                        raise ValueError("maze has a loop; a tree index needs a perfect maze")
+                    depth[j] = d
+                    parent[j] = i
+                    # jump two equal steps up if i's jump and its jump's jump
+                    # are the same length, else just to the parent
+                    up = jump[i]
+                    jump[j] = jump[up] if depth[i] - depth[up] == depth[up] - depth[jump[up]] else i
+                    append(j)
+            frontier = next_frontier
+        self.parent = array("i", parent)
+        self.depth = array("i", depth)
+        self.jump = array("i", jump)
+
+    @property
+    def stale(self):
+        return self.grid.version != self.version
+
+    def _check(self, i, j):
+        if self.stale:
+            raise RuntimeError("maze walls changed since the tree index was built")
+        # cells cut off from the root are not in the tree
+        return self.depth[i] >= 0 and self.depth[j] >= 0
+
+    def lca(self, i, j):
+        # lowest common ancestor of cell indices i and j, or -1 if either is
+        # unreachable from the root
+        if not self._check(i, j):
+            return -1
+        return self._lca(i, j)
+
+    def _lca(self, i, j):
+        depth = self.depth
+        parent = self.parent
+        jump = self.jump
+        if depth[i] < depth[j]:
+            i, j = j, i
+        # lift i to j's depth, then lift both together; cells at the same
+        # depth have jump pointers of the same length
+        target = depth[j]
+        while depth[i] > target:
+            i = jump[i] if depth[jump[i]] >= target else parent[i]
+        while i != j:
+            if jump[i] != jump[j]:
+                i = jump[i]
+                j = jump[j]
+            else:
+                i = parent[i]
+                j = parent[j]
+        return i
+
+    def distance(self, start, goal):
+        # number of moves between two (col, row) cells, None if unreachable
+        i = self.grid.index(*start)
+        j = self.grid.index(*goal)
+        if not self._check(i, j):
+            return None
+        depth = self.depth
+        return depth[i] + depth[j] - 2 * depth[self._lca(i, j)]
+
+    def path(self, start, goal):
+        # (col, row) cells from start to goal, like SolveResult.path; empty
+        # if unreachable
+        grid = self.grid
+        i = grid.index(*start)
+        j = grid.index(*goal)
+        if not self._check(i, j):
+            return []
+        ancestor = self._lca(i, j)
+        parent = self.parent
+        head = [i]
+        while head[-1] != ancestor:
+            head.append(parent[head[-1]])
+        tail = []
+        while j != ancestor:
+            tail.append(j)
+            j = parent[j]
+        head.extend(reversed(tail))
+        return [grid.position(k) for k in head]
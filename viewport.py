@@ -0,0 +1,277 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from grid import Grid, WALL_RIGHT, WALL_BOTTOM, BOTTOM_FLAGS, RIGHT_FLAGS, flag_runs
+
+if TYPE_CHECKING:
+    from window import Window
+
+# Zoomable, pannable view of a Grid for mazes far too big to draw whole.
+#
+# The maze is split into square tiles of cells and only tiles that overlap
+# the window have canvas items. Panning shifts the existing items with one
+# canvas move(), creates the tiles that scrolled into view and deletes the
+# ones that left it, so the work per pan is proportional to the newly
+# exposed area. Zooming clears the view and draws the visible tiles again.
+#
+# Up close, every tile is drawn as its wall runs: one line per maximal
+# straight run of wall, not four per cell. Zoomed out below `lod_scale`
+# pixels per cell, a tile is drawn as a grid of blocks filled with a grey
+# level proportional to the fraction of wall in the block. The densities are
+# computed once per tile and block size and cached; the caches and the view
+# are rebuilt when Grid.version shows the walls changed.
+
+# screen pixels a tile aims to cover, and a level-of-detail block
+TILE_PIXELS = 256
+BLOCK_PIXELS = 6
+TAG = "viewport"
+
+# walls owned by a cell: 0, 1 or 2
+_WALL_COUNT = bytes(bool(b & WALL_RIGHT) + bool(b & WALL_BOTTOM) for b in range(256))
+# rows of wall counts that can be added as big integers before a byte could
+# overflow into its neighbour (127 * 2 <= 255)
+_ROWS_PER_SUM = 127
+
+
+def _grey(density):
+    level = 255 - int(density * 255)
+    return f"#{level:02x}{level:02x}{level:02x}"
+
+
+class Viewport:
+    def __init__(self, win: Window, grid: Grid, scale=10.0, lod_scale=4.0):
+        self.win = win
+        self.grid = grid
+        self.canvas = win.canvas
+        # pixels per cell, and the world pixel shown at the canvas origin
+        self.scale = float(scale)
+        self.lod_scale = lod_scale
+        self.x = 0.0
+        self.y = 0.0
+        self._version = grid.version
+        self._tiles = set()
+        self._densities = {}
+        self._drag = None
+
+    # -- geometry --
+
+    def _tile_cells(self):
+        # a power of two, so tiles line up as the zoom changes
+        cells = 16
+        while cells * self.scale < TILE_PIXELS:
+            cells *= 2
+        return cells
+
+    def visible_tiles(self):
+        tile = self._tile_cells()
+        span = tile * self.scale
+        first_x = max(0, int(self.x // span))
+        first_y = max(0, int(self.y // span))
+        # the last tile starting left of / above the far edge
+        last_x = min((self.grid.num_cols - 1) // tile, int(-(-(self.x + self.win.width) // span)) - 1)
+        last_y = min((self.grid.num_rows - 1) // tile, int(-(-(self.y + self.win.height) // span)) - 1)
+        return {(tx, ty) for tx in range(first_x, last_x + 1) for ty in range(first_y, last_y + 1)}
+
+    def cell_at(self, x, y):
+        # (col, row) under a canvas pixel, or None outside the maze
+        col = int((self.x + x) // self.scale)
+        row = int((self.y + y) // self.scale)
+        if 0 <= col < self.grid.num_cols and 0 <= row < self.grid.num_rows:
+            return col, row
+        return None
+
+    # -- view changes --
+
+    def render(self):
+        # bring the canvas up to date: new tiles drawn, hidden ones deleted
+        if self.grid.version != self._version:
+            self._version = self.grid.version
+            self._densities.clear()
+            self.clear()
+        visible = self.visible_tiles()
+        for tile in self._tiles - visible:
+            self.canvas.delete(self._tag(tile))
+        for tile in visible - self._tiles:
+            self._draw_tile(tile)
+        self._tiles = visible
+
+    def clear(self):
+        self.canvas.delete(TAG)
+        self._tiles = set()
+
+    def pan(self, dx, dy):
+        # move the view by (dx, dy) canvas pixels
+        if not dx and not dy:
+            return
+        self.x += dx
+        self.y += dy
+        self.canvas.move(TAG, -dx, -dy)
+        self.render()
+
+    def zoom(self, factor, x=0, y=0):
+        # scale by `factor`, keeping canvas pixel (x, y) over the same spot
+        scale = self.scale * factor
+        self.x = (self.x + x) * scale / self.scale - x
+        self.y = (self.y + y) * scale / self.scale - y
+        self.scale = scale
+        self.clear()
+        self.render()
+
+    def show(self, col, row, scale=None):
+        # centre the view on a cell, optionally at a new scale
+        if scale is not None:
+            self.scale = float(scale)
+        self.x = (col + 0.5) * self.scale - self.win.width / 2
+        self.y = (row + 0.5) * self.scale - self.win.height / 2
+        self.clear()
+        self.render()
+
+    def bind(self):
+        # drag with the left button, zoom with the wheel or +/-, pan with
+        # the arrow keys
+        win = self.win
+        win.bind("<ButtonPress-1>", lambda event: self._start_drag(event.x, event.y))
+        win.bind("<B1-Motion>", lambda event: self._drag_to(event.x, event.y))
+        win.bind("<MouseWheel>", lambda event: self.zoom(1.25 if event.delta > 0 else 0.8, event.x, event.y))
+        win.bind("<Button-4>", lambda event: self.zoom(1.25, event.x, event.y))
+        win.bind("<Button-5>", lambda event: self.zoom(0.8, event.x, event.y))
+        win.bind("<plus>", lambda event: self.zoom(1.25, win.width / 2, win.height / 2))
+        win.bind("<minus>", lambda event: self.zoom(0.8, win.width / 2, win.height / 2))
+        step = 64
+        win.bind("<Left>", lambda event: self.pan(-step, 0))
+        win.bind("<Right>", lambda event: self.pan(step, 0))
+        win.bind("<Up>", lambda event: self.pan(0, -step))
+        win.bind("<Down>", lambda event: self.pan(0, step))
+
+    def _start_drag(self, x, y):
+        self._drag = (x, y)
+
+    def _drag_to(self, x, y):
+        if self._drag is None:
+            self._drag = (x, y)
+            return
+        last_x, last_y = self._drag
+        self._drag = (x, y)
+        self.pan(last_x - x, last_y - y)
+
+    # -- drawing --
+
+    def _tag(self, tile):
+        return f"t{tile[0]}_{tile[1]}"
+
+    def _draw_tile(self, tile):
+        tile_cells = self._tile_cells()
+        grid = self.grid
+        c0 = tile[0] * tile_cells
+        r0 = tile[1] * tile_cells
+        c1 = min(c0 + tile_cells, grid.num_cols)
+        r1 = min(r0 + tile_cells, grid.num_rows)
+        tags = (TAG, self._tag(tile))
+        if self.scale < self.lod_scale:
+            self._draw_blocks(tile, c0, r0, c1, r1, tags)
+        else:
+            self._draw_walls(c0, r0, c1, r1, tags)
+
+    def _draw_walls(self, c0, r0, c1, r1, tags):
+        # Each tile draws the wall lines above and left of its cells; the
+        # tiles on the bottom and right edge also draw the outer border.
+        grid = self.grid
+        cells = grid.cells
+        cols = grid.num_cols
+        scale = self.scale
+        x0 = c0 * scale - self.x
+        create_line = self.canvas.create_line
+        width = 2 if scale >= 8 else 1
+        last_row = r1 + 1 if r1 == grid.num_rows else r1
+        for boundary in range(r0, last_row):
+            if boundary == 0:
+                flags = bytes(grid.top[c0:c1])
+            else:
+                start = (boundary - 1) * cols
+                flags = bytes(cells[start + c0:start + c1]).translate(BOTTOM_FLAGS)
+            y = boundary * scale - self.y
+            for start, end in flag_runs(flags):
+                create_line(x0 + start * scale, y, x0 + end * scale, y, width=width, tags=tags)
+        y0 = r0 * scale - self.y
+        last_col = c1 + 1 if c1 == cols else c1
+        for line in range(c0, last_col):
+            if line == 0:
+                flags = bytes(grid.left[r0:r1])
+            else:
+                flags = bytes(cells[r0 * cols + line - 1:r1 * cols:cols]).translate(RIGHT_FLAGS)
+            x = line * scale - self.x
+            for start, end in flag_runs(flags):
+                create_line(x, y0 + start * scale, x, y0 + end * scale, width=width, tags=tags)
+
+    def _block_cells(self):
+        return max(1, round(BLOCK_PIXELS / self.scale))
+
+    def densities(self, tile):
+        # wall fraction of every level-of-detail block in a tile, row-major;
+        # cached per (tile size, block size, tile)
+        tile_cells = self._tile_cells()
+        block = self._block_cells()
+        key = (tile_cells, block, tile)
+        cached = self._densities.get(key)
+        if cached is not None:
+            return cached
+        grid = self.grid
+        cells = grid.cells
+        cols = grid.num_cols
+        c0 = tile[0] * tile_cells
+        r0 = tile[1] * tile_cells
+        c1 = min(c0 + tile_cells, cols)
+        r1 = min(r0 + tile_cells, grid.num_rows)
+        width = c1 - c0
+        blocks_x = -(-width // block)
+        totals = [0] * (blocks_x * -(-(r1 - r0) // block))
+        # per block row, add whole rows of per-cell wall counts as big
+        # integers (column sums, one byte each), then sum each block's bytes
+        for top in range(r0, r1, block):
+            base = (top - r0) // block * blocks_x
+            bottom = min(top + block, r1)
+            for chunk in range(top, bottom, _ROWS_PER_SUM):
+                column_sums = 0
+                for row in range(chunk, min(chunk + _ROWS_PER_SUM, bottom)):
+                    start = row * cols
+                    column_sums += int.from_bytes(bytes(cells[start + c0:start + c1]).translate(_WALL_COUNT), "big")
+                column_sums = column_sums.to_bytes(width, "big")
+                for k in range(blocks_x):
+                    totals[base + k] += sum(column_sums[k * block:(k + 1) * block])
+        result = []
+        for index, total in enumerate(totals):
+            # two walls per cell at most
+            block_width = min(block, width - index % blocks_x * block)
+            block_height = min(block, r1 - r0 - index // blocks_x * block)
+            result.append(total / (2 * block_width * block_height))
+        self._densities[key] = result
+        return result
+
+    def _draw_blocks(self, tile, c0, r0, c1, r1, tags):
+        block = self._block_cells()
+        size = block * self.scale
+        blocks_x = -(-(c1 - c0) // block)
+        create_rectangle = self.canvas.create_rectangle
+        x0 = c0 * self.scale - self.x
+        y0 = r0 * self.scale - self.y
+        for index, density in enumerate(self.densities(tile)):
+            by, bx = divmod(index, blocks_x)
+            x = x0 + bx * size
+            y = y0 + by * size
+            w = min(size, (c1 - c0 - bx * block) * self.scale)
+            h = min(size, (r1 - r0 - by * block) * self.scale)
+            colour = _grey(density)
+            create_rectangle(x, y, x + w, y + h, fill=colour, outline=colour, tags=tags)
+
+
+if __name__ == "__main__":
+    # python3 viewport.py [side]: browse a large maze
+    import sys
+    from maze import Maze
+    from window import Window
+    side = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    maze = Maze(0, 0, side, side, 10, 10, seed=1, algorithm="sidewinder")
+    win = Window(800, 600)
+    view = Viewport(win, maze.grid, scale=800 / side)
+    view.bind()
+    view.render()
+    win.wait_for_close()
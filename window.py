@@ -1,29 +1,59 @@
 from __future__ import annotations
-from tkinter import Tk, BOTH, Canvas
+from typing import TYPE_CHECKING
+import time
+
+if TYPE_CHECKING:
+    from tkinter import Canvas
 
 class Window:
     def __init__(self, width, height):
+        # tkinter is imported here rather than at module load so headless
+        # users of Point/Line (and of maze.py) never need a Tk installation
+        from tkinter import Tk, BOTH, Canvas
         self.width = width
         self.height = height
         self._root = Tk()
         self._root.title("Maze Solver")
         self._canvas = Canvas(self._root, height=self.height, width=self.width)
         self._canvas.pack(fill=BOTH, expand=1)
+        self._items = CanvasItems(self._canvas)
         self._running = False
         self._root.protocol("WM_DELETE_WINDOW", self.close)
         self.bg = self._canvas.cget("bg")
 
+    @property
+    def canvas(self):
+        # for renderers that manage their own items, e.g. viewport.Viewport
+        return self._canvas
+
     def draw_line(self, line: Line, fill_color):
-        line.draw(self._canvas, fill_color)
+        # queued until the next redraw(); see CanvasItems
+        self._items.draw_line(line, fill_color)
+
+    def flush(self):
+        # apply queued line updates; Tk repaints them when it next goes idle
+        self._items.flush()
 
     def redraw(self):
+        self._items.flush()
         self._root.update_idletasks()
         self._root.update()
 
+    def after(self, delay_ms, callback):
+        return self._root.after(delay_ms, callback)
+
+    def after_cancel(self, after_id):
+        self._root.after_cancel(after_id)
+
+    def bind(self, sequence, callback):
+        self._root.bind(sequence, callback)
+
     def wait_for_close(self):
+        # block in Tk's own event loop (idle until an event or an after()
+        # callback arrives) rather than spinning on redraw()
+        self.flush()
         self._running = True
-        while self._running:
-            self.redraw()
+        self._root.mainloop()
 
     def resize(self, width, height):
         self.width = width
@@ -34,6 +64,47 @@ class Window:
 
     def close(self):
         self._running = False
+        self._root.quit()
+
+class CanvasItems:
+    # Keeps one canvas item per distinct line segment. Walls shared by two
+    # cells and a move drawn forward and then undone map to the same segment,
+    # so redrawing only recolours the existing item with itemconfig instead
+    # of stacking new items. Updates are queued and applied together by
+    # flush(), once per frame; the canvas therefore holds O(cells) items no
+    # matter how long the animation runs.
+    def __init__(self, canvas: Canvas):
+        self._canvas = canvas
+        self._items = {}
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def draw_line(self, line: Line, fill_color):
+        self._pending[line.key()] = (line, fill_color)
+
+    def flush(self):
+        for key, (line, fill_color) in self._pending.items():
+            item = self._items.get(key)
+            if item is None:
+                self._items[key] = line.draw(self._canvas, fill_color)
+            else:
+                self._canvas.itemconfig(item, fill=fill_color)
+        self._pending.clear()
+
+class Renderer:
+    # Drives animation for a Window. Maze draws through the renderer and
+    # calls frame() after every drawn step; frame() flushes the window and
+    # then waits `delay` seconds so the animation is visible.
+    def __init__(self, win: Window, delay=0.05):
+        self.win = win
+        self.delay = delay
+
+    def frame(self):
+        self.win.redraw()
+        if self.delay > 0:
+            time.sleep(self.delay)
 
 class Point:
     def __init__(self, x, y):
@@ -45,8 +116,14 @@ class Line:
         self.start = start
         self.end = end
     
+    def key(self):
+        # direction-independent identity of the segment
+        start = (self.start.x, self.start.y)
+        end = (self.end.x, self.end.y)
+        return (start, end) if start <= end else (end, start)
+
     def draw(self, canvas: Canvas, fill_color):
-        canvas.create_line(self.start.x,
+        return canvas.create_line(self.start.x,
                             self.start.y,
                             self.end.x,
                             self.end.y,